@@ -1,10 +1,13 @@
-from django.db import models
+import json
+
+from django.db import models, connection
 from django.contrib.postgres.fields import ArrayField
 
 from apps.workspaces.models import Workspace
 
 from .helpers import generate_choices_from_enum
 from .enums import DimensionDetailSourceTypeEnum
+from .queries import DIMENSION_DETAILS_UPSERT_QUERY
 
 
 SOURCE_TYPE_CHOICES = generate_choices_from_enum(DimensionDetailSourceTypeEnum)
@@ -28,52 +31,33 @@ class DimensionDetail(models.Model):
         unique_together = ('attribute_type', 'display_name', 'workspace_id', 'source_type')
 
     @staticmethod
-    def bulk_create_or_update_dimension_details(dimensions: list[dict], workspace_id: int, source_type: str) -> None:
+    def bulk_create_or_update_dimension_details(dimensions: list[dict], workspace_id: int, source_type: str) -> dict:
         """
-        Bulk create or update dimension details
+        Bulk create or update dimension details in one statement
+        Dimensions are upserted on (attribute_type, display_name, workspace_id, source_type),
+        a dimension synced with a single display name renames its only existing row
+        :param dimensions: [{'attribute_type': ..., 'display_name': ..., 'source_type': ...}]
+        :param workspace_id: Workspace Id
+        :param source_type: Source type of dimensions without one
+        :return: {'created': count, 'updated': count}
         """
-        attribute_types = set([dimension['attribute_type'] for dimension in dimensions])
-
-        existing_dimensions = DimensionDetail.objects.filter(
-            attribute_type__in=attribute_types,
-            workspace_id=workspace_id,
-            source_type=source_type
-        ).values(
-            'id',
-            'attribute_type',
-            'display_name',
-            'source_type'
-        )
-
-        existing_dimension_map = {dimension['attribute_type']: dimension for dimension in existing_dimensions}
-
-        dimensions_to_be_created = []
-        dimensions_to_be_updated = []
+        rows = [
+            {
+                'attribute_type': dimension['attribute_type'],
+                'display_name': dimension['display_name'],
+                'source_type': dimension.get('source_type') or source_type
+            }
+            for dimension in dimensions
+        ]
 
-        for dimension in dimensions:
-            if dimension['attribute_type'] not in existing_dimension_map:
-                dimensions_to_be_created.append(DimensionDetail(
-                    attribute_type=dimension['attribute_type'],
-                    display_name=dimension['display_name'],
-                    source_type=dimension['source_type'],
-                    workspace_id=workspace_id
-                ))
-            else:
-                existing_dimension = existing_dimension_map[dimension['attribute_type']]
-                if existing_dimension['display_name'] != dimension['display_name']:
-                    dimensions_to_be_updated.append(DimensionDetail(
-                        id=existing_dimension['id'],
-                        attribute_type=dimension['attribute_type'],
-                        display_name=dimension['display_name'],
-                        source_type=dimension['source_type'],
-                        workspace_id=workspace_id
-                    ))
+        if not rows:
+            return {'created': 0, 'updated': 0}
 
-        if dimensions_to_be_created:
-            DimensionDetail.objects.bulk_create(dimensions_to_be_created, batch_size=50)
+        with connection.cursor() as cursor:
+            cursor.execute(DIMENSION_DETAILS_UPSERT_QUERY, {'workspace_id': workspace_id, 'rows': json.dumps(rows)})
+            created_count, updated_count = cursor.fetchone()
 
-        if dimensions_to_be_updated:
-            DimensionDetail.objects.bulk_update(dimensions_to_be_updated, ['display_name'], batch_size=50)
+        return {'created': created_count, 'updated': updated_count}
 
 
 class DataMigrationBatch(models.Model):
@@ -0,0 +1,50 @@
+"""
+Raw SQL used by set-based bulk operations
+"""
+
+# A dimension synced with a single display name renames its only existing row, as the per-attribute_type sync did,
+# any other display name is inserted on the (attribute_type, display_name, workspace_id, source_type) key
+DIMENSION_DETAILS_UPSERT_QUERY = """
+    with staged as (
+        select distinct staged.attribute_type, staged.display_name, staged.source_type
+        from jsonb_to_recordset(%(rows)s::jsonb) as staged(attribute_type text, display_name text, source_type text)
+    ), staged_counts as (
+        select attribute_type, source_type, count(*) as display_name_count
+        from staged
+        group by attribute_type, source_type
+    ), existing_counts as (
+        select dd.attribute_type, dd.source_type, count(*) as display_name_count
+        from dimension_details as dd
+        join staged_counts
+            on staged_counts.attribute_type = dd.attribute_type and staged_counts.source_type = dd.source_type
+        where dd.workspace_id = %(workspace_id)s
+        group by dd.attribute_type, dd.source_type
+    ), renamed as (
+        update dimension_details as dd
+        set display_name = staged.display_name, updated_at = now()
+        from staged
+        join staged_counts
+            on staged_counts.attribute_type = staged.attribute_type and staged_counts.source_type = staged.source_type
+        join existing_counts
+            on existing_counts.attribute_type = staged.attribute_type and existing_counts.source_type = staged.source_type
+        where dd.workspace_id = %(workspace_id)s
+            and dd.attribute_type = staged.attribute_type
+            and dd.source_type = staged.source_type
+            and dd.display_name <> staged.display_name
+            and staged_counts.display_name_count = 1
+            and existing_counts.display_name_count = 1
+        returning dd.attribute_type, dd.source_type
+    ), created as (
+        insert into dimension_details (workspace_id, attribute_type, display_name, source_type, created_at, updated_at)
+        select %(workspace_id)s, staged.attribute_type, staged.display_name, staged.source_type, now(), now()
+        from staged
+        where not exists (
+            select 1
+            from renamed
+            where renamed.attribute_type = staged.attribute_type and renamed.source_type = staged.source_type
+        )
+        on conflict (attribute_type, display_name, workspace_id, source_type) do nothing
+        returning id
+    )
+    select (select count(*) from created) as created_count, (select count(*) from renamed) as updated_count
+"""
@@ -0,0 +1,301 @@
+import json
+import logging
+import multiprocessing
+import resource
+import uuid
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.conf import settings
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .e2e_fixtures import BaseFixtureFactory
+from .helpers import EmployeesAutoMappingHelper
+from .models import (
+    CategoryMapping, Mapping, ExpenseAttribute, DestinationAttribute,
+    ExpenseAttributesDeletionCache, ExpenseAttributesDeletionStaging, Workspace
+)
+from .utils import iterate_in_batches
+from .views import (
+    MappingStatsView, ExpenseAttributesMappingView, EmployeeAttributesMappingView,
+    CategoryAttributesMappingView, DestinationAttributesView, DestinationAttributesStatsView
+)
+
+logger = logging.getLogger(__name__)
+logger.level = logging.INFO
+
+SEED_BATCH_SIZE = 5000
+
+
+class BenchmarkFixtureFactory(BaseFixtureFactory):
+    """
+    Factory seeding a workspace with `count` attributes per attribute type for benchmarks
+    Values are derived from the row index only, so every run on the same count sees the same data
+    """
+
+    def __init__(self, count: int, batch_size: int = SEED_BATCH_SIZE):
+        self.count = count
+        self.batch_size = batch_size
+
+    def _bulk_create(self, model, objects: Iterator):
+        for objects_batch in iterate_in_batches(objects, self.batch_size):
+            model.objects.bulk_create(objects_batch, batch_size=self.batch_size)
+
+    def expense_attribute_payloads(self, attribute_type: str) -> Iterator[Dict]:
+        """Expense attribute payloads as accepted by the bulk sync methods"""
+        for i in range(self.count):
+            detail = None
+            if attribute_type == 'EMPLOYEE':
+                detail = {'full_name': f'Benchmark Employee {i}', 'employee_code': f'EMP{i}'}
+
+            if attribute_type == 'EMPLOYEE':
+                value = f'employee{i}@benchmark.fyle.in'
+            else:
+                value = f'Benchmark {attribute_type.title()} {i}'
+
+            yield {
+                'attribute_type': attribute_type,
+                'display_name': attribute_type.replace('_', ' ').title(),
+                'value': value,
+                'source_id': f'{attribute_type.lower()}_{i}',
+                'detail': detail,
+                'active': True
+            }
+
+    def destination_attribute_payloads(self, attribute_type: str) -> Iterator[Dict]:
+        """Destination attribute payloads, only every other row matches a Fyle attribute"""
+        for i in range(self.count):
+            detail = None
+            if attribute_type in ('EMPLOYEE', 'VENDOR'):
+                detail = {'email': f'employee{i * 2}@benchmark.fyle.in'}
+            elif attribute_type == 'EXPENSE_TYPE':
+                detail = {'gl_account_no': f'account_{i}'}
+
+            yield {
+                'attribute_type': attribute_type,
+                'display_name': attribute_type.replace('_', ' ').lower(),
+                'value': f'Benchmark Category {i * 2}' if attribute_type == 'ACCOUNT' else f'Benchmark {attribute_type.title()} {i}',
+                'destination_id': f'{attribute_type.lower()}_{i}',
+                'detail': detail,
+                'active': True,
+                'code': None
+            }
+
+    def seed_expense_attributes(self, workspace, attribute_types: List[str]):
+        """Seed expense attributes in batches"""
+        for attribute_type in attribute_types:
+            self._bulk_create(ExpenseAttribute, (
+                ExpenseAttribute(workspace=workspace, **payload) for payload in self.expense_attribute_payloads(attribute_type)
+            ))
+
+    def seed_destination_attributes(self, workspace, attribute_types: List[str]):
+        """Seed destination attributes in batches"""
+        for attribute_type in attribute_types:
+            self._bulk_create(DestinationAttribute, (
+                DestinationAttribute(
+                    workspace=workspace,
+                    fingerprint=DestinationAttribute.get_fingerprint(payload),
+                    **payload
+                ) for payload in self.destination_attribute_payloads(attribute_type)
+            ))
+
+    def seed_category_mappings(self, workspace):
+        """Map every category to the expense type with the same index, without a ccc account"""
+        category_ids = ExpenseAttribute.objects.filter(
+            workspace=workspace, attribute_type='CATEGORY').order_by('id').values_list('id', flat=True)
+        expense_type_ids = DestinationAttribute.objects.filter(
+            workspace=workspace, attribute_type='EXPENSE_TYPE').order_by('id').values_list('id', flat=True)
+
+        self._bulk_create(CategoryMapping, (
+            CategoryMapping(
+                workspace=workspace,
+                source_category_id=category_id,
+                destination_expense_head_id=expense_type_id,
+                created_at=timezone.now(),
+                updated_at=timezone.now()
+            ) for category_id, expense_type_id in zip(list(category_ids), list(expense_type_ids))
+        ))
+
+    def seed_workspace(self, workspace):
+        """Seed all the data the benchmarks run against"""
+        self.seed_expense_attributes(workspace, ['CATEGORY', 'PROJECT', 'COST_CENTER', 'EMPLOYEE'])
+        self.seed_destination_attributes(workspace, ['ACCOUNT', 'VENDOR', 'EMPLOYEE', 'EXPENSE_TYPE', 'CREDIT_CARD_ACCOUNT'])
+        self.create_mapping_settings(workspace)
+        self.seed_category_mappings(workspace)
+
+        # Fresh rows have no planner statistics, the benchmarks should run on the plans production would get
+        with connection.cursor() as cursor:
+            cursor.execute('analyze expense_attributes, destination_attributes, mappings, category_mappings, employee_mappings')
+
+
+def _measure_in_process(function: Callable, result_connection):
+    """
+    Run a function and send its measures through result_connection, meant to be the target of a forked process
+    """
+    try:
+        peak_rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        with CaptureQueriesContext(connection) as captured:
+            start = perf_counter()
+            function()
+            wall_time = perf_counter() - start
+
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        result_connection.send({
+            'query_count': len(captured.captured_queries),
+            'wall_time_seconds': round(wall_time, 4),
+            'peak_rss_kb': peak_rss,
+            'peak_rss_growth_kb': peak_rss - peak_rss_before
+        })
+    except Exception as exception:
+        result_connection.send({'error': repr(exception)})
+    finally:
+        connection.close()
+        result_connection.close()
+
+
+def measure(name: str, function: Callable) -> Dict:
+    """
+    Run a function once in a forked process and measure it
+    ru_maxrss is the peak RSS over the lifetime of a process, a fork starts its own peak from the current RSS,
+    so the peak of a benchmark does not carry over to the ones run after it
+    :param name: Benchmark name
+    :param function: Function to be measured
+    :return: Query count, wall time and peak RSS of the benchmark process
+    """
+    # The forked process opens its own database connection instead of sharing the socket of this one
+    connections.close_all()
+
+    result_receiver, result_sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context('fork').Process(target=_measure_in_process, args=(function, result_sender))
+    process.start()
+    result_sender.close()
+
+    try:
+        measures = result_receiver.recv()
+    except EOFError:
+        measures = None
+    finally:
+        process.join()
+        result_receiver.close()
+
+    if measures is None:
+        raise RuntimeError(f'Benchmark {name} process exited with code {process.exitcode}')
+
+    if 'error' in measures:
+        raise RuntimeError(f"Benchmark {name} failed - {measures['error']}")
+
+    result = {'name': name, **measures}
+    logger.info("Benchmark %s: %s queries in %ss", name, result['query_count'], result['wall_time_seconds'])
+
+    return result
+
+
+def get_view_benchmark(view_class, workspace_id: int, query_params: Dict) -> Callable:
+    """
+    Build a callable requesting a view and rendering its response
+    """
+    request_factory = APIRequestFactory()
+    view = view_class.as_view()
+
+    def request_view():
+        # Paginated responses build absolute urls on the test client host
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            request = request_factory.get('/', query_params)
+            force_authenticate(request, user=get_user_model()())
+            response = view(request, workspace_id=workspace_id)
+            response.render()
+
+    return request_view
+
+
+def run_benchmarks(workspace_id: int, count: int) -> List[Dict]:
+    """
+    Time the hot paths against a seeded workspace
+    :param workspace_id: Workspace seeded by BenchmarkFixtureFactory with the same count
+    :param count: Number of attributes per attribute type
+    :return: Benchmark results
+    """
+    factory = BenchmarkFixtureFactory(count)
+    sync_run_id = str(uuid.uuid4())
+
+    def stage_and_sweep_categories():
+        ExpenseAttributesDeletionStaging.stage_attributes(
+            workspace_id, 'CATEGORY', sync_run_id,
+            (payload['source_id'] for payload in factory.expense_attribute_payloads('CATEGORY'))
+        )
+        ExpenseAttribute.bulk_update_deleted_expense_attributes('CATEGORY', workspace_id, sync_run_id)
+
+    def sweep_projects_from_cache():
+        ExpenseAttributesDeletionCache.objects.update_or_create(
+            workspace_id=workspace_id,
+            defaults={'project_ids': [payload['source_id'] for payload in factory.expense_attribute_payloads('PROJECT')]}
+        )
+        ExpenseAttribute.bulk_update_deleted_expense_attributes('PROJECT', workspace_id)
+
+    def sync_and_sweep_vendors():
+        DestinationAttribute.bulk_create_or_update_destination_attributes(
+            factory.destination_attribute_payloads('VENDOR'), 'VENDOR', workspace_id,
+            update=True, use_fingerprint=True, sync_run_id=sync_run_id
+        )
+        DestinationAttribute.disable_unsynced_destination_attributes('VENDOR', workspace_id, sync_run_id)
+
+    benchmarks = [
+        ('expense_attributes_bulk_upsert', lambda: ExpenseAttribute.bulk_upsert_expense_attributes(
+            factory.expense_attribute_payloads('COST_CENTER'), 'COST_CENTER', workspace_id, update=True)),
+        ('expense_attributes_bulk_create_or_update', lambda: ExpenseAttribute.bulk_create_or_update_expense_attributes(
+            factory.expense_attribute_payloads('PROJECT'), 'PROJECT', workspace_id, update=True)),
+        ('destination_attributes_bulk_create_or_update', lambda: DestinationAttribute.bulk_create_or_update_destination_attributes(
+            factory.destination_attribute_payloads('ACCOUNT'), 'ACCOUNT', workspace_id, update=True)),
+        ('expense_attributes_deletion_sweep_cache', sweep_projects_from_cache),
+        ('expense_attributes_deletion_sweep_staging', stage_and_sweep_categories),
+        ('destination_attributes_sync_run_sweep', sync_and_sweep_vendors),
+        ('mappings_bulk_auto_map_attributes', lambda: Mapping.bulk_auto_map_attributes('CATEGORY', 'ACCOUNT', workspace_id)),
+        ('mappings_auto_map_employees', lambda: Mapping.auto_map_employees('VENDOR', 'EMAIL', workspace_id)),
+        ('employees_auto_mapping_helper_reimburse_mapping', lambda: EmployeesAutoMappingHelper(
+            workspace_id, 'EMPLOYEE', 'EMAIL').reimburse_mapping()),
+        ('category_mappings_bulk_create_ccc_category_mappings', lambda: CategoryMapping.bulk_create_ccc_category_mappings(
+            workspace_id)),
+        ('mapping_stats_view', get_view_benchmark(MappingStatsView, workspace_id, {
+            'source_type': 'CATEGORY', 'destination_type': 'ACCOUNT'})),
+        ('expense_attributes_mapping_view', get_view_benchmark(ExpenseAttributesMappingView, workspace_id, {
+            'source_type': 'CATEGORY', 'destination_type': 'ACCOUNT', 'mapped': 'false'})),
+        ('employee_attributes_mapping_view', get_view_benchmark(EmployeeAttributesMappingView, workspace_id, {
+            'destination_type': 'VENDOR', 'mapped': 'true'})),
+        ('category_attributes_mapping_view', get_view_benchmark(CategoryAttributesMappingView, workspace_id, {
+            'destination_type': 'EXPENSE_TYPE', 'mapped': 'true'})),
+        ('destination_attributes_view', get_view_benchmark(DestinationAttributesView, workspace_id, {
+            'attribute_type': 'ACCOUNT'})),
+        ('destination_attributes_stats_view', get_view_benchmark(DestinationAttributesStatsView, workspace_id, {
+            'attribute_type': 'ACCOUNT'}))
+    ]
+
+    return [measure(name, function) for name, function in benchmarks]
+
+
+def run_benchmark_suite(workspace_id: int, count: int, seed: bool = True) -> str:
+    """
+    Seed a workspace and run the benchmarks against it
+    :param workspace_id: Workspace ID, should not hold any other data
+    :param count: Number of attributes per attribute type
+    :param seed: Seed the workspace before running
+    :return: JSON report
+    """
+    if seed:
+        workspace = Workspace.objects.get(pk=workspace_id)
+        start = perf_counter()
+        BenchmarkFixtureFactory(count).seed_workspace(workspace)
+        logger.info("Seeded Workspace %s with %s attributes per type in %ss", workspace_id, count, round(perf_counter() - start, 2))
+
+    return json.dumps({
+        'workspace_id': workspace_id,
+        'count': count,
+        'database_vendor': connection.vendor,
+        'ran_at': timezone.now().isoformat(),
+        'results': run_benchmarks(workspace_id, count)
+    }, indent=2)
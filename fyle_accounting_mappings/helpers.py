@@ -1,11 +1,29 @@
-from typing import List
+from typing import List, Iterator, Tuple
 
 from django.db.models import Q
+from django.db.models.fields.json import KeyTextTransform
 
 import django_filters
 
 
-from .models import EmployeeMapping, DestinationAttribute, ExpenseAttribute
+from .models import EmployeeMapping, DestinationAttribute, ExpenseAttribute, MappingSetting
+from .utils import iterate_in_keyset_pages
+
+EMPLOYEE_SOURCE_PAGE_SIZE = 200
+
+# Position of the matched key in the (id, value, full_name, employee_code) source rows
+SOURCE_ROW_KEY_INDEX = {
+    'EMAIL': 1,
+    'NAME': 2,
+    'EMPLOYEE_CODE': 3
+}
+
+DESTINATION_UPDATE_KEY = {
+    'EMPLOYEE': 'destination_employee_id',
+    'VENDOR': 'destination_vendor_id',
+    'CREDIT_CARD_ACCOUNT': 'destination_card_account_id',
+    'CHARGE_CARD_NUMBER': 'destination_card_account_id'
+}
 
 class EmployeesAutoMappingHelper:
     """
@@ -48,7 +66,7 @@ class EmployeesAutoMappingHelper:
         for mapping in mappings:
             expense_attributes_to_be_updated.append(
                 ExpenseAttribute(
-                    id=mapping.source_employee.id,
+                    id=mapping.source_employee_id,
                     auto_mapped=True
                 )
             )
@@ -105,11 +123,7 @@ class EmployeesAutoMappingHelper:
         Construct Existing Employee Mappings Map
         :return: Existing Employee Mappings Map
         """
-        existing_employee_mappings = self.get_existing_employee_mappings()
-        existing_employee_mappings_map = {employee_mapping.source_employee_id: employee_mapping.id \
-            for employee_mapping in existing_employee_mappings}
-
-        return existing_employee_mappings_map
+        return dict(self.get_existing_employee_mappings().values_list('source_employee_id', 'id'))
 
 
     def construct_mapping_payload(self, employee_source_attributes: List[ExpenseAttribute]
@@ -152,6 +166,53 @@ class EmployeesAutoMappingHelper:
         return mapping_creation_batch, mapping_updation_batch, update_key
 
 
+    def match_source_attribute_rows(self, source_attribute_rows: List[Tuple],
+                                    existing_employee_mappings_map: dict) -> (List[EmployeeMapping], list, str):
+        """
+        Batch counterpart of construct_mapping_payload working on plain rows
+        Mapping objects are only built for the rows that match a destination attribute
+        :param source_attribute_rows: (id, value, full_name, employee_code) rows
+        :param existing_employee_mappings_map: source_employee_id -> employee mapping id
+        :return: mapping_creation_batch, mapping_updation_batch, update_key
+        """
+        mapping_creation_batch = []
+        mapping_updation_batch = []
+        update_key = DESTINATION_UPDATE_KEY.get(self.destination_type)
+        key_index = SOURCE_ROW_KEY_INDEX.get(self.employee_mapping_preference)
+
+        if not update_key or key_index is None:
+            return mapping_creation_batch, mapping_updation_batch, None
+
+        destination_ids = [
+            self.destination_value_id_map.get((row[key_index] or '').lower()) for row in source_attribute_rows
+        ]
+
+        for row, destination_id in zip(source_attribute_rows, destination_ids):
+            if destination_id is None:
+                continue
+
+            if row[0] in existing_employee_mappings_map:
+                # If employee mapping row exists, then update it
+                mapping_updation_batch.append(
+                    EmployeeMapping(
+                        id=existing_employee_mappings_map[row[0]],
+                        source_employee_id=row[0],
+                        **{update_key: destination_id}
+                    )
+                )
+            else:
+                # If employee mapping row does not exist, then create it
+                mapping_creation_batch.append(
+                    EmployeeMapping(
+                        source_employee_id=row[0],
+                        workspace_id=self.workspace_id,
+                        **{update_key: destination_id}
+                    )
+                )
+
+        return mapping_creation_batch, mapping_updation_batch, update_key
+
+
     def get_unmapped_destination_attributes(self) -> list:
         """
         Get Unmapped Destination Attributes
@@ -172,10 +233,10 @@ class EmployeesAutoMappingHelper:
         ).values('id', 'value', 'detail')
 
 
-    def get_unmapped_source_attributes(self) -> List[EmployeeMapping]:
+    def get_unmapped_source_filter(self) -> dict:
         """
-        Get Unmapped Source Attributes
-        :return: Unmapped Source Attributes
+        Get Unmapped Source Filter
+        :return: Filter for the employees not yet mapped to the destination type
         """
         source_filter = {
             'attribute_type': 'EMPLOYEE',
@@ -190,6 +251,16 @@ class EmployeesAutoMappingHelper:
         elif self.destination_type == 'CREDIT_CARD_ACCOUNT' or self.destination_type == 'CHARGE_CARD_NUMBER':
             source_filter['employeemapping__destination_card_account__isnull'] = True
 
+        return source_filter
+
+
+    def get_unmapped_source_attributes(self) -> List[EmployeeMapping]:
+        """
+        Get Unmapped Source Attributes
+        :return: Unmapped Source Attributes
+        """
+        source_filter = self.get_unmapped_source_filter()
+
         employee_source_attributes_count = ExpenseAttribute.objects.filter(**source_filter).count()
         page_size = 200
         employee_source_attributes = []
@@ -202,6 +273,20 @@ class EmployeesAutoMappingHelper:
         return employee_source_attributes
 
 
+    def iterate_unmapped_source_attribute_rows(self) -> Iterator[List[Tuple]]:
+        """
+        Iterate Unmapped Source Attributes as (id, value, full_name, employee_code) rows, in keyset pages on id
+        :return: Iterator of pages of rows
+        """
+        source_attribute_rows = ExpenseAttribute.objects.filter(
+            **self.get_unmapped_source_filter()
+        ).values_list(
+            'id', 'value', KeyTextTransform('full_name', 'detail'), KeyTextTransform('employee_code', 'detail')
+        )
+
+        return iterate_in_keyset_pages(source_attribute_rows, EMPLOYEE_SOURCE_PAGE_SIZE, get_row_id=lambda row: row[0])
+
+
     def set_destination_value_id_map(self, destination_attributes: list) -> dict:
         """
         Construct Destination Value ID Map
@@ -233,14 +318,15 @@ class EmployeesAutoMappingHelper:
         # Set destination value id map
         self.set_destination_value_id_map(destination_attributes)
 
-        # Get unmapped source attributes
-        employee_source_attributes = self.get_unmapped_source_attributes()
+        existing_employee_mappings_map = self.construct_existing_employee_mappings_map()
 
-        mapping_creation_batch, mapping_updation_batch, update_key = self.construct_mapping_payload(
-            employee_source_attributes
-        )
+        # Match and write unmapped source attributes page by page
+        for source_attribute_rows in self.iterate_unmapped_source_attribute_rows():
+            mapping_creation_batch, mapping_updation_batch, update_key = self.match_source_attribute_rows(
+                source_attribute_rows, existing_employee_mappings_map
+            )
 
-        self.create_mappings_and_update_flag(mapping_creation_batch, mapping_updation_batch, update_key)
+            self.create_mappings_and_update_flag(mapping_creation_batch, mapping_updation_batch, update_key)
 
     def ccc_mapping(self, default_ccc_account_id: str, attribute_type: str = None):
         """
@@ -289,6 +375,29 @@ class EmployeesAutoMappingHelper:
             )
 
 
+class MappingStatsHelper:
+    """
+    MappingStatsHelper resolves the pairs the mapping stats of a workspace are served for,
+    the counts themselves are kept by MappingStatsCache.
+    """
+    def __init__(self, workspace_id: int):
+        """
+        Initialize the MappingStatsHelper class.
+        """
+        self.workspace_id = workspace_id
+
+    def get_mapping_settings_pairs(self) -> List[Tuple[str, str]]:
+        """
+        Get (source_type, destination_type) pairs configured in Mapping Settings
+        :return: pairs
+        """
+        return list(
+            MappingSetting.objects.filter(
+                workspace_id=self.workspace_id
+            ).order_by('id').values_list('source_field', 'destination_field')
+        )
+
+
 class ExpenseAttributeFilter(django_filters.FilterSet):
     mapping_source_alphabets = django_filters.CharFilter(method='filter_mapping_source_alphabets')
     value = django_filters.CharFilter(field_name='value', lookup_expr='icontains')
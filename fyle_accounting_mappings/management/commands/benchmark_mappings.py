@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from fyle_accounting_mappings.benchmarks import run_benchmark_suite
+
+
+class Command(BaseCommand):
+    """
+    Seed a workspace and time the mapping hot paths, eg.
+    python manage.py benchmark_mappings --workspace-id 1 --count 10000 --output benchmarks_10k.json
+    """
+    help = 'Seed a workspace with benchmark data and report query counts, wall time and peak RSS as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workspace-id', type=int, required=True, help='Empty workspace to seed and benchmark')
+        parser.add_argument('--count', type=int, default=1000, help='Number of attributes per attribute type')
+        parser.add_argument('--skip-seed', action='store_true', help='Run against an already seeded workspace')
+        parser.add_argument('--output', type=str, default=None, help='File to write the JSON report to')
+
+    def handle(self, *args, **options):
+        report = run_benchmark_suite(options['workspace_id'], options['count'], seed=not options['skip_seed'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(report)
+        else:
+            self.stdout.write(report)
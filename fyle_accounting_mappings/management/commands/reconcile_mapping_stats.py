@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from fyle_accounting_mappings.models import MappingStatsCache, DestinationAttributesStatsCache, STATS_APP_NAMES
+
+
+class Command(BaseCommand):
+    """
+    Recount the cached mapping / destination attribute stats from the source tables, eg.
+    python manage.py reconcile_mapping_stats --workspace-id 1
+    """
+    help = 'Recompute MappingStatsCache and DestinationAttributesStatsCache rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workspace-id', type=int, default=None, help='Only reconcile this workspace')
+
+    def handle(self, *args, **options):
+        workspace_ids = set()
+
+        for model in (MappingStatsCache, DestinationAttributesStatsCache):
+            cached_stats = model.objects.all()
+            if options['workspace_id']:
+                cached_stats = cached_stats.filter(workspace_id=options['workspace_id'])
+            workspace_ids.update(cached_stats.values_list('workspace_id', flat=True).distinct())
+
+        # Rows keyed on options the counts do not depend on are never read, see MappingStatsCache.get_stats_options
+        unused_stats = MappingStatsCache.objects.filter(
+            ~Q(app_name__in=['', *STATS_APP_NAMES])
+            | Q(employee_vendor_purchase_from=True) & ~Q(app_name='QuickBooks Desktop Connector')
+        )
+        if options['workspace_id']:
+            unused_stats = unused_stats.filter(workspace_id=options['workspace_id'])
+        deleted_count, _ = unused_stats.delete()
+
+        for workspace_id in sorted(workspace_ids):
+            MappingStatsCache.refresh_stats(workspace_id)
+            DestinationAttributesStatsCache.refresh_stats(workspace_id)
+
+        self.stdout.write(f'Reconciled stats of {len(workspace_ids)} workspaces, deleted {deleted_count} unused rows')
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0032_add_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destinationattribute',
+            name='fingerprint',
+            field=models.CharField(help_text='Hash of the syncable fields of the attribute', max_length=32, null=True),
+        ),
+    ]
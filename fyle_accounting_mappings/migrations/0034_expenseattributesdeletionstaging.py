@@ -0,0 +1,32 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0033_destinationattribute_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseAttributesDeletionStaging',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('workspace_id', models.IntegerField(help_text='Reference to the workspace')),
+                ('attribute_type', models.CharField(help_text='Type of expense attribute', max_length=255)),
+                ('sync_run_id', models.CharField(help_text='Identifier of the sync run', max_length=255)),
+                ('identifier', models.CharField(help_text='Fyle source id / value of the seen attribute', max_length=1000)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Created at datetime')),
+            ],
+            options={
+                'db_table': 'expense_attributes_deletion_staging',
+                'unique_together': {('workspace_id', 'attribute_type', 'sync_run_id', 'identifier')},
+            },
+        ),
+        migrations.RunSQL(
+            sql='ALTER TABLE expense_attributes_deletion_staging SET UNLOGGED',
+            reverse_sql='ALTER TABLE expense_attributes_deletion_staging SET LOGGED'
+        ),
+    ]
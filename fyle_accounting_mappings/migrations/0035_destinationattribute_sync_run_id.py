@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0034_expenseattributesdeletionstaging'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destinationattribute',
+            name='sync_run_id',
+            field=models.CharField(help_text='Identifier of the last sync run that returned the attribute', max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0035_destinationattribute_sync_run_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MappingStatsCache',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('source_type', models.CharField(help_text='Fyle Enum', max_length=255)),
+                ('destination_type', models.CharField(help_text='Destination Enum', max_length=255)),
+                ('app_name', models.CharField(default='', help_text='Name of the app the counts are computed for', max_length=255)),
+                ('employee_vendor_purchase_from', models.BooleanField(
+                    default=False, help_text='Whether employees are counted as mapped to either a vendor or an employee')),
+                ('all_attributes_count', models.IntegerField(default=0, help_text='Count of active source attributes')),
+                ('unmapped_attributes_count', models.IntegerField(default=0, help_text='Count of active unmapped source attributes')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Created at datetime')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Updated at datetime')),
+                ('workspace', models.ForeignKey(
+                    help_text='Reference to Workspace model', on_delete=django.db.models.deletion.PROTECT, to='workspaces.workspace')),
+            ],
+            options={
+                'db_table': 'mapping_stats_cache',
+                'unique_together': {('workspace', 'source_type', 'destination_type', 'app_name', 'employee_vendor_purchase_from')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DestinationAttributesStatsCache',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('attribute_type', models.CharField(help_text='Type of destination attribute', max_length=255)),
+                ('display_name', models.CharField(default='', help_text='Display name of attribute, empty for all', max_length=255)),
+                ('attributes_count', models.IntegerField(default=0, help_text='Count of attributes')),
+                ('active_attributes_count', models.IntegerField(default=0, help_text='Count of active attributes')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Created at datetime')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Updated at datetime')),
+                ('workspace', models.ForeignKey(
+                    help_text='Reference to Workspace model', on_delete=django.db.models.deletion.PROTECT, to='workspaces.workspace')),
+            ],
+            options={
+                'db_table': 'destination_attributes_stats_cache',
+                'unique_together': {('workspace', 'attribute_type', 'display_name')},
+            },
+        ),
+    ]
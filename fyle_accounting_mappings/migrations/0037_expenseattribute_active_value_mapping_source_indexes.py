@@ -0,0 +1,25 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0036_mappingstatscache_destinationattributesstatscache'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expenseattribute',
+            index=models.Index(
+                condition=models.Q(('active', True)),
+                fields=['workspace_id', 'attribute_type', 'value', 'id'],
+                name='fyle_accoun_workspa_ea_val_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='mapping',
+            index=models.Index(fields=['source_id', 'destination_type'], name='fyle_accoun_source_mp_idx'),
+        ),
+    ]
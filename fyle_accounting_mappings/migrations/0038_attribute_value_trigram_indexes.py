@@ -0,0 +1,38 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0037_expenseattribute_active_value_mapping_source_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='expenseattribute',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('value'), name='gin_trgm_ops'),
+                name='fyle_accoun_value_ea_trgm_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='destinationattribute',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('value'), name='gin_trgm_ops'),
+                name='fyle_accoun_value_da_trgm_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='destinationattribute',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('code'), name='gin_trgm_ops'),
+                name='fyle_accoun_code_da_trgm_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0038_attribute_value_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkspaceDataVersion',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('table_name', models.CharField(help_text='Table of the changed rows', max_length=255)),
+                ('attribute_type', models.CharField(help_text='Attribute type / source type of the changed rows', max_length=255)),
+                ('changed_at', models.DateTimeField(help_text='Datetime when the rows were last changed')),
+                ('workspace', models.ForeignKey(
+                    help_text='Reference to Workspace model', on_delete=django.db.models.deletion.PROTECT, to='workspaces.workspace')),
+            ],
+            options={
+                'db_table': 'workspace_data_versions',
+                'unique_together': {('workspace', 'table_name', 'attribute_type')},
+            },
+        ),
+        migrations.AddField(
+            model_name='mappingstatscache',
+            name='counted_at',
+            field=models.DateTimeField(help_text='Datetime when the counts were computed', null=True),
+        ),
+        migrations.AddField(
+            model_name='destinationattributesstatscache',
+            name='counted_at',
+            field=models.DateTimeField(help_text='Datetime when the counts were computed', null=True),
+        ),
+    ]
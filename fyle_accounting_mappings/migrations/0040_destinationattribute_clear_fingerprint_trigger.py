@@ -0,0 +1,43 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations
+
+
+# A write changing the syncable fields without writing the fingerprint (QuerySet.update, bulk_update, raw SQL)
+# leaves a fingerprint of the previous values, fingerprint syncs would then skip the attribute for good
+CLEAR_FINGERPRINT_TRIGGER_SQL = """
+    create or replace function clear_destination_attribute_fingerprint() returns trigger as $$
+    begin
+        new.fingerprint := null;
+        return new;
+    end;
+    $$ language plpgsql;
+
+    create trigger destination_attributes_clear_fingerprint
+        before update on destination_attributes
+        for each row
+        when (
+            (old.value, old.detail, old.active, old.code) is distinct from (new.value, new.detail, new.active, new.code)
+            and old.fingerprint is not distinct from new.fingerprint
+        )
+        execute function clear_destination_attribute_fingerprint();
+"""
+
+DROP_CLEAR_FINGERPRINT_TRIGGER_SQL = """
+    drop trigger if exists destination_attributes_clear_fingerprint on destination_attributes;
+    drop function if exists clear_destination_attribute_fingerprint();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0039_workspacedataversion_stats_counted_at'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=CLEAR_FINGERPRINT_TRIGGER_SQL,
+            reverse_sql=DROP_CLEAR_FINGERPRINT_TRIGGER_SQL
+        ),
+    ]
@@ -0,0 +1,263 @@
+# Generated by Django 4.2.24 on 2026-10-18
+
+from django.db import migrations
+
+
+# Tables whose changes are recorded, with the expression giving the attribute type / source type of a changed row
+RECORDED_TABLES = {
+    'expense_attributes': 'attribute_type',
+    'destination_attributes': 'attribute_type',
+    'mappings': 'source_type',
+    'employee_mappings': "''EMPLOYEE''",
+    'category_mappings': "''CATEGORY''",
+}
+
+# Apps counting categories through category_mappings, same as models.CATEGORY_MAPPING_APPS
+CATEGORY_MAPPING_APPS_SQL = "('Sage Intacct', 'Sage 300 CRE', 'Dynamics 365 Business Central', 'NetSuite')"
+
+# Keys changed by a transaction are recorded per statement without touching any shared row, rows of a transaction
+# are unique on transaction_id so concurrent writers never wait on each other here. The deferred trigger applies
+# each key once when the transaction commits, the table is therefore empty outside of running transactions.
+WORKSPACE_DATA_CHANGES_SQL = """
+    create unlogged table workspace_data_changes (
+        transaction_id bigint not null,
+        workspace_id integer not null,
+        table_name varchar(255) not null,
+        attribute_type varchar(255) not null,
+        primary key (transaction_id, workspace_id, table_name, attribute_type)
+    );
+
+    create or replace function record_workspace_data_changes() returns trigger as $$
+    begin
+        execute format(
+            'insert into workspace_data_changes (transaction_id, workspace_id, table_name, attribute_type)
+            select distinct txid_current(), workspace_id, %L, %s from %s
+            on conflict do nothing',
+            tg_table_name,
+            tg_argv[0],
+            case tg_op
+                when 'INSERT' then 'inserted_rows'
+                when 'DELETE' then 'deleted_rows'
+                else '(select * from deleted_rows union all select * from inserted_rows) as changed_rows'
+            end
+        );
+        return null;
+    end;
+    $$ language plpgsql;
+"""
+
+# Mapped counts follow the mapping rules of the apps, per app_name / employee_vendor_purchase_from,
+# rows are locked first so a recount waiting on a concurrent one counts its changes
+REFRESH_MAPPING_STATS_CACHE_SQL = """
+    create or replace function refresh_mapping_stats_cache(stats_workspace_id integer, source_types text[]) returns void as $$
+    begin
+        perform 1 from mapping_stats_cache
+        where workspace_id = stats_workspace_id and source_type = any(source_types)
+        order by id
+        for update;
+
+        if not found then
+            return;
+        end if;
+
+        update mapping_stats_cache as cache
+        set all_attributes_count = counts.all_attributes_count,
+            unmapped_attributes_count = counts.all_attributes_count - counts.mapped_attributes_count,
+            counted_at = now(),
+            updated_at = now()
+        from (
+            select
+                stats.id,
+                count(ea.id) as all_attributes_count,
+                count(ea.id) filter (where
+                    case
+                        when stats.source_type = 'EMPLOYEE' and stats.app_name = 'XERO' then exists (
+                            select 1 from mappings
+                            where mappings.source_id = ea.id and mappings.source_type = 'EMPLOYEE'
+                        )
+                        when stats.source_type = 'EMPLOYEE' and stats.app_name = 'QuickBooks Desktop Connector'
+                            and stats.employee_vendor_purchase_from then exists (
+                            select 1 from employee_mappings
+                            where employee_mappings.source_employee_id = ea.id
+                                and (employee_mappings.destination_vendor_id is not null
+                                    or employee_mappings.destination_employee_id is not null)
+                        )
+                        when stats.source_type = 'EMPLOYEE' then exists (
+                            select 1 from employee_mappings
+                            join destination_attributes as destination on destination.id = case
+                                when stats.destination_type = 'VENDOR' then employee_mappings.destination_vendor_id
+                                else employee_mappings.destination_employee_id
+                            end
+                            where employee_mappings.source_employee_id = ea.id
+                                and destination.attribute_type = stats.destination_type
+                        )
+                        when stats.source_type = 'CATEGORY' and stats.app_name in {category_mapping_apps} then exists (
+                            select 1 from category_mappings
+                            join destination_attributes as destination on destination.id = case
+                                when stats.destination_type = 'ACCOUNT' then category_mappings.destination_account_id
+                                else category_mappings.destination_expense_head_id
+                            end
+                            where category_mappings.source_category_id = ea.id
+                                and destination.attribute_type = stats.destination_type
+                        )
+                        else exists (
+                            select 1 from mappings
+                            where mappings.source_id = ea.id
+                                and mappings.source_type = stats.source_type
+                                and case
+                                    when stats.app_name = 'QuickBooks Online' and stats.source_type = 'CORPORATE_CARD'
+                                        then mappings.destination_type in ('CREDIT_CARD_ACCOUNT', 'BANK_ACCOUNT')
+                                    else mappings.destination_type = stats.destination_type
+                                end
+                        )
+                    end
+                    -- The 'Activity' category is counted as mapped when no mapping exists for it
+                    or (ea.attribute_type = 'CATEGORY' and ea.value = 'Activity' and not case
+                        when stats.app_name in {category_mapping_apps} then exists (
+                            select 1 from category_mappings
+                            join expense_attributes as source on source.id = category_mappings.source_category_id
+                            where category_mappings.workspace_id = stats.workspace_id and source.value = 'Activity'
+                        )
+                        else exists (
+                            select 1 from mappings
+                            join expense_attributes as source on source.id = mappings.source_id
+                            where mappings.workspace_id = stats.workspace_id
+                                and mappings.source_type = 'CATEGORY' and source.value = 'Activity'
+                        )
+                    end)
+                ) as mapped_attributes_count
+            from mapping_stats_cache as stats
+            left join expense_attributes as ea
+                on ea.workspace_id = stats.workspace_id and ea.attribute_type = stats.source_type and ea.active = true
+            where stats.workspace_id = stats_workspace_id and stats.source_type = any(source_types)
+            group by stats.id
+        ) as counts
+        where cache.id = counts.id;
+    end;
+    $$ language plpgsql;
+""".format(category_mapping_apps=CATEGORY_MAPPING_APPS_SQL)
+
+REFRESH_DESTINATION_ATTRIBUTES_STATS_CACHE_SQL = """
+    create or replace function refresh_destination_attributes_stats_cache(stats_workspace_id integer, stats_attribute_type text)
+    returns void as $$
+    begin
+        perform 1 from destination_attributes_stats_cache
+        where workspace_id = stats_workspace_id and attribute_type = stats_attribute_type
+        order by id
+        for update;
+
+        if not found then
+            return;
+        end if;
+
+        update destination_attributes_stats_cache as cache
+        set attributes_count = counts.attributes_count,
+            active_attributes_count = counts.active_attributes_count,
+            counted_at = now(),
+            updated_at = now()
+        from (
+            select
+                stats.id,
+                count(da.id) as attributes_count,
+                count(da.id) filter (where da.active) as active_attributes_count
+            from destination_attributes_stats_cache as stats
+            left join destination_attributes as da
+                on da.workspace_id = stats.workspace_id
+                and da.attribute_type = stats.attribute_type
+                and (stats.display_name = '' or da.display_name = stats.display_name)
+            where stats.workspace_id = stats_workspace_id and stats.attribute_type = stats_attribute_type
+            group by stats.id
+        ) as counts
+        where cache.id = counts.id;
+    end;
+    $$ language plpgsql;
+"""
+
+# The version of the key is bumped and the stats counted from its table recounted, mapping stats are recounted
+# once per transaction and type, by the last change applied to a table they are counted from
+APPLY_WORKSPACE_DATA_CHANGE_SQL = """
+    create or replace function apply_workspace_data_change() returns trigger as $$
+    begin
+        delete from workspace_data_changes
+        where transaction_id = new.transaction_id and workspace_id = new.workspace_id
+            and table_name = new.table_name and attribute_type = new.attribute_type;
+
+        insert into workspace_data_versions (workspace_id, table_name, attribute_type, changed_at)
+        values (new.workspace_id, new.table_name, new.attribute_type, clock_timestamp())
+        on conflict (workspace_id, table_name, attribute_type) do update set changed_at = excluded.changed_at;
+
+        if new.table_name = 'destination_attributes' then
+            perform refresh_destination_attributes_stats_cache(new.workspace_id, new.attribute_type);
+        elsif not exists (
+            select 1 from workspace_data_changes
+            where transaction_id = new.transaction_id and workspace_id = new.workspace_id
+                and attribute_type = new.attribute_type and table_name <> 'destination_attributes'
+        ) then
+            perform refresh_mapping_stats_cache(new.workspace_id, array[new.attribute_type::text]);
+        end if;
+
+        return null;
+    end;
+    $$ language plpgsql;
+
+    create constraint trigger workspace_data_changes_apply
+        after insert on workspace_data_changes
+        deferrable initially deferred
+        for each row
+        execute function apply_workspace_data_change();
+"""
+
+
+def get_record_triggers_sql() -> str:
+    """
+    Statement level triggers recording the keys changed by every insert, update and delete of the recorded tables,
+    a trigger with transition tables can only be defined for a single event
+    """
+    statements = []
+
+    for table_name, attribute_type in RECORDED_TABLES.items():
+        for event, transition_tables in (
+            ('insert', 'new table as inserted_rows'),
+            ('update', 'old table as deleted_rows new table as inserted_rows'),
+            ('delete', 'old table as deleted_rows')
+        ):
+            statements.append(f"""
+                create trigger {table_name}_record_{event}
+                    after {event} on {table_name}
+                    referencing {transition_tables}
+                    for each statement
+                    execute function record_workspace_data_changes('{attribute_type}');
+            """)
+
+    return ''.join(statements)
+
+
+def get_drop_record_triggers_sql() -> str:
+    return ''.join(
+        f'drop trigger if exists {table_name}_record_{event} on {table_name};'
+        for table_name in RECORDED_TABLES for event in ('insert', 'update', 'delete')
+    )
+
+
+DROP_WORKSPACE_DATA_CHANGES_SQL = """
+    drop table if exists workspace_data_changes;
+    drop function if exists apply_workspace_data_change();
+    drop function if exists refresh_mapping_stats_cache(integer, text[]);
+    drop function if exists refresh_destination_attributes_stats_cache(integer, text);
+    drop function if exists record_workspace_data_changes();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_accounting_mappings', '0040_destinationattribute_clear_fingerprint_trigger'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=WORKSPACE_DATA_CHANGES_SQL + REFRESH_MAPPING_STATS_CACHE_SQL + REFRESH_DESTINATION_ATTRIBUTES_STATS_CACHE_SQL
+            + APPLY_WORKSPACE_DATA_CHANGE_SQL + get_record_triggers_sql(),
+            reverse_sql=get_drop_record_triggers_sql() + DROP_WORKSPACE_DATA_CHANGES_SQL
+        ),
+    ]
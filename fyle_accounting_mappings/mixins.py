@@ -1,25 +1,74 @@
-from django.db import models
+from typing import Iterable, List
+
+import django
+from django.db import models, transaction
+
+
+def get_user_email(user) -> str or None:
+    """
+    Email stored in created_by / updated_by for a user
+    :param user: User instance or None
+    :return: Email or None
+    """
+    return user.email if user and hasattr(user, 'email') else None
 
 
 class AutoAddCreateUpdateInfoManager(models.Manager):
     def update_or_create(self, defaults=None, **kwargs):
         """
         Overrides the default update_or_create to handle 'user' keyword argument.
+        updated_by is written with the defaults, created_by with the create defaults on Django 5.0 and above
+        and by an update of the created row in the same transaction before.
         """
-        user = kwargs.pop("user", None)
-        defaults = defaults or {}
+        user_email = get_user_email(kwargs.pop('user', None))
+        defaults = dict(defaults or {})
 
-        if user and hasattr(user, "email"):
-            defaults["updated_by"] = user.email
+        if not user_email:
+            return super().update_or_create(defaults=defaults, **kwargs)
 
-        instance, created = super().update_or_create(defaults=defaults, **kwargs)
+        defaults['updated_by'] = user_email
 
-        if created and user and hasattr(user, "email"):
-            instance.created_by = user.email
-            instance.save(user=user)
+        if django.VERSION >= (5, 0):
+            return super().update_or_create(
+                defaults=defaults, create_defaults={**defaults, 'created_by': user_email}, **kwargs)
+
+        with transaction.atomic(using=self.db):
+            instance, created = super().update_or_create(defaults=defaults, **kwargs)
+
+            if created:
+                self.filter(pk=instance.pk).update(created_by=user_email)
+                instance.created_by = user_email
 
         return instance, created
 
+    def bulk_create(self, objs: Iterable, *args, user=None, **kwargs) -> List:
+        """
+        bulk_create stamping created_by / updated_by of every object with the email of the user
+        """
+        objs = list(objs)
+        user_email = get_user_email(user)
+
+        if user_email:
+            for obj in objs:
+                obj.created_by = user_email
+                obj.updated_by = user_email
+
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs: Iterable, fields: List[str], *args, user=None, **kwargs) -> int:
+        """
+        bulk_update stamping updated_by of every object with the email of the user
+        """
+        objs = list(objs)
+        user_email = get_user_email(user)
+
+        if user_email:
+            for obj in objs:
+                obj.updated_by = user_email
+            fields = [*fields, 'updated_by'] if 'updated_by' not in fields else fields
+
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
 
 class AutoAddCreateUpdateInfoMixin(models.Model):
     """
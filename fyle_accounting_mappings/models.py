@@ -1,15 +1,35 @@
+import hashlib
 import importlib
+import json
 import logging
-from typing import List, Dict
+from typing import List, Dict, Iterable, Set, Tuple
 from datetime import datetime, timezone, timedelta
 from django.utils.module_loading import import_string
-from django.db import models, transaction
-from django.db.models import Q, JSONField, F
+from django.db import models, transaction, connection, DatabaseError
+from django.db.models import Q, JSONField, F, Count
+from django.db.models.functions import Upper
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db.models.fields.json import KeyTextTransform
 
 from .exceptions import BulkError
-from .utils import assert_valid
+from .utils import assert_valid, iterate_in_batches, iterate_in_keyset_pages
+from .queries import (
+    EXPENSE_ATTRIBUTES_UPSERT_QUERY,
+    EXPENSE_ATTRIBUTES_UPSERT_UPDATE_ACTION,
+    EXPENSE_ATTRIBUTES_UPSERT_SKIP_ACTION,
+    EXPENSE_ATTRIBUTES_DISABLE_DELETED_QUERY,
+    EXPENSE_ATTRIBUTES_DISABLE_DELETED_CUSTOM_FIELDS_QUERY,
+    EXPENSE_ATTRIBUTES_DELETION_STAGING_INSERT_QUERY,
+    EXPENSE_ATTRIBUTES_DISABLE_UNSTAGED_QUERY,
+    EXPENSE_ATTRIBUTES_DISABLE_UNSTAGED_CUSTOM_FIELDS_QUERY,
+    DESTINATION_ATTRIBUTES_DISABLE_UNSYNCED_QUERY,
+    MAPPINGS_AUTO_MAP_INSERT_QUERY,
+    EXPENSE_ATTRIBUTES_SET_AUTO_MAPPED_QUERY,
+    EXPENSE_FIELDS_UPSERT_QUERY,
+    MAPPING_STATS_CACHE_REFRESH_QUERY,
+    DESTINATION_ATTRIBUTES_STATS_CACHE_REFRESH_QUERY
+)
 
 from .mixins import AutoAddCreateUpdateInfoMixin
 
@@ -19,6 +39,30 @@ Workspace = workspace_models.Workspace
 logger = logging.getLogger(__name__)
 logger.level = logging.INFO
 
+# Number of rows sent to the database in a single INSERT ... ON CONFLICT statement
+ATTRIBUTES_UPSERT_BATCH_SIZE = 5000
+
+# Number of incoming attributes looked up and written together by the bulk sync methods
+ATTRIBUTES_SYNC_BATCH_SIZE = 1000
+EMPLOYEES_AUTO_MAP_PAGE_SIZE = 200
+
+# Apps mapping categories through CategoryMapping instead of Mapping, counted by the SQL of migration 0041
+CATEGORY_MAPPING_APPS = ('Sage Intacct', 'Sage 300 CRE', 'Dynamics 365 Business Central', 'NetSuite')
+
+# Apps with their own mapped counting rules, every other app name is counted the same way
+STATS_APP_NAMES = ('XERO', 'QuickBooks Desktop Connector', 'QuickBooks Online', *CATEGORY_MAPPING_APPS)
+
+# Rows staged by sync runs older than this were left behind by runs that were never reconciled
+DELETION_STAGING_MAX_AGE = timedelta(days=1)
+
+# attribute_type -> (ExpenseAttributesDeletionCache field, ExpenseAttribute field it holds)
+DELETION_CACHE_FIELD_MAP = {
+    'CATEGORY': ('category_ids', 'source_id'),
+    'PROJECT': ('project_ids', 'source_id'),
+    'COST_CENTER': ('cost_center_ids', 'source_id'),
+    'MERCHANT': ('merchant_list', 'value')
+}
+
 
 def validate_mapping_settings(mappings_settings: List[Dict]):
     bulk_errors = []
@@ -59,7 +103,7 @@ def create_mappings_and_update_flag(mapping_batch: list, set_auto_mapped_flag: b
         for mapping in mappings:
             expense_attributes_to_be_updated.append(
                 ExpenseAttribute(
-                    id=mapping.source_category.id if model_type == CategoryMapping else mapping.source.id,
+                    id=mapping.source_category_id if model_type == CategoryMapping else mapping.source_id,
                     auto_mapped=True
                 )
             )
@@ -72,8 +116,10 @@ def create_mappings_and_update_flag(mapping_batch: list, set_auto_mapped_flag: b
 
 
 def construct_mapping_payload(employee_source_attributes: list, employee_mapping_preference: str,
-                              destination_id_value_map: dict, destination_type: str, workspace_id: int):
-    existing_source_ids = get_existing_source_ids(destination_type, workspace_id)
+                              destination_id_value_map: dict, destination_type: str, workspace_id: int,
+                              *, existing_source_ids: Set[int] = None):
+    if existing_source_ids is None:
+        existing_source_ids = get_existing_source_ids(destination_type, workspace_id)
 
     mapping_batch = []
     for source_attribute in employee_source_attributes:
@@ -102,16 +148,54 @@ def construct_mapping_payload(employee_source_attributes: list, employee_mapping
     return mapping_batch
 
 
-def get_existing_source_ids(destination_type: str, workspace_id: int):
-    existing_mappings = Mapping.objects.filter(
-        source_type='EMPLOYEE', destination_type=destination_type, workspace_id=workspace_id
-    ).all()
+def get_existing_source_ids(destination_type: str, workspace_id: int) -> Set[int]:
+    return set(
+        Mapping.objects.filter(
+            source_type='EMPLOYEE', destination_type=destination_type, workspace_id=workspace_id
+        ).values_list('source_id', flat=True)
+    )
+
+
+def get_workspaces_sync_payloads(payloads: Iterable[Dict], results: Dict[tuple, Dict]) -> Dict[tuple, Dict]:
+    """
+    Validate the payloads of a multi-workspace sync, errors are set in results for their pair only
+    Attributes are read into lists, so iterables and generators are accepted
+    :param payloads: [{'workspace_id': int, 'attribute_type': str, 'attributes': Iterable[Dict], ...}]
+    :param results: Results of the sync, keyed by (workspace_id, attribute_type)
+    :return: (workspace_id, attribute_type) -> payload, with attributes as a list
+    """
+    payloads_by_pair = {}
+
+    for payload in payloads:
+        pair = (payload.get('workspace_id'), payload.get('attribute_type')) if isinstance(payload, dict) else (None, None)
+
+        if pair in results or pair in payloads_by_pair:
+            results[pair] = {'error': 'Duplicate payload for workspace and attribute type'}
+            payloads_by_pair.pop(pair, None)
+            continue
 
-    existing_source_ids = []
-    for mapping in existing_mappings:
-        existing_source_ids.append(mapping.source.id)
+        if not isinstance(pair[0], int) or not isinstance(pair[1], str) or not pair[1]:
+            results[pair] = {'error': 'Invalid payload - workspace_id and attribute_type are required'}
+            continue
 
-    return existing_source_ids
+        attributes = payload.get('attributes')
+        if attributes is None or isinstance(attributes, (str, bytes, dict)):
+            results[pair] = {'error': 'Invalid payload - attributes should be a list of attributes'}
+            continue
+
+        try:
+            attributes = list(attributes)
+        except Exception as exception:
+            results[pair] = {'error': f'Invalid attributes payload - {exception}'}
+            continue
+
+        if not all(isinstance(attribute, dict) for attribute in attributes):
+            results[pair] = {'error': 'Invalid attributes payload - attributes should be dicts'}
+            continue
+
+        payloads_by_pair[pair] = {**payload, 'attributes': attributes}
+
+    return payloads_by_pair
 
 
 class ExpenseAttributesDeletionCache(models.Model):
@@ -128,6 +212,42 @@ class ExpenseAttributesDeletionCache(models.Model):
         db_table = 'expense_attributes_deletion_cache'
 
 
+class ExpenseAttributesDeletionStaging(models.Model):
+    """
+    Attributes seen in Fyle during a sync run, append-only alternative to ExpenseAttributesDeletionCache
+    The table is UNLOGGED, rows are cheap inserts and are removed once the run is reconciled,
+    along with the rows left behind by older runs of the same types that were never reconciled
+    """
+    id = models.BigAutoField(primary_key=True)
+    workspace_id = models.IntegerField(help_text='Reference to the workspace')
+    attribute_type = models.CharField(max_length=255, help_text='Type of expense attribute')
+    sync_run_id = models.CharField(max_length=255, help_text='Identifier of the sync run')
+    identifier = models.CharField(max_length=1000, help_text='Fyle source id / value of the seen attribute')
+    created_at = models.DateTimeField(auto_now_add=True, help_text='Created at datetime')
+
+    class Meta:
+        db_table = 'expense_attributes_deletion_staging'
+        unique_together = ('workspace_id', 'attribute_type', 'sync_run_id', 'identifier')
+
+    @staticmethod
+    def stage_attributes(workspace_id: int, attribute_type: str, sync_run_id: str, identifiers: Iterable[str]):
+        """
+        Append the attributes seen in a sync batch
+        :param workspace_id: Workspace Id
+        :param attribute_type: Attribute type
+        :param sync_run_id: Identifier of the sync run
+        :param identifiers: source_id for CATEGORY / PROJECT / COST_CENTER, value for MERCHANT and custom fields
+        """
+        with connection.cursor() as cursor:
+            for identifiers_batch in iterate_in_batches(identifiers, ATTRIBUTES_UPSERT_BATCH_SIZE):
+                cursor.execute(EXPENSE_ATTRIBUTES_DELETION_STAGING_INSERT_QUERY, {
+                    'workspace_id': workspace_id,
+                    'attribute_type': attribute_type,
+                    'sync_run_id': sync_run_id,
+                    'identifiers': identifiers_batch
+                })
+
+
 class ExpenseAttribute(models.Model):
     """
     Fyle Expense Attributes
@@ -151,6 +271,13 @@ class ExpenseAttribute(models.Model):
         unique_together = ('value', 'attribute_type', 'workspace')
         indexes = [
             models.Index(fields=['workspace_id', 'attribute_type']),
+            models.Index(
+                fields=['workspace_id', 'attribute_type', 'value', 'id'],
+                condition=Q(active=True),
+                name='fyle_accoun_workspa_ea_val_idx'
+            ),
+            # icontains compiles to UPPER(value) LIKE UPPER(%s), a trigram index on the same expression serves it
+            GinIndex(OpClass(Upper('value'), name='gin_trgm_ops'), name='fyle_accoun_value_ea_trgm_idx'),
         ]
 
     @staticmethod
@@ -172,83 +299,115 @@ class ExpenseAttribute(models.Model):
         return expense_attribute
 
     @staticmethod
-    def bulk_update_deleted_expense_attributes(attribute_type: str, workspace_id: int):
+    def bulk_update_deleted_expense_attributes(attribute_type: str, workspace_id: int, sync_run_id: str = None) -> int:
         """
         Bulk update deleted expense attributes
+        Attributes missing from ExpenseAttributesDeletionCache are disabled with a single UPDATE per attribute type
         :param attribute_type: Attribute type
         :param workspace_id: Workspace Id
+        :param sync_run_id: If passed, attributes are reconciled against the ones staged for this
+                            sync run in ExpenseAttributesDeletionStaging instead of the cache arrays
+        :return: Number of disabled attributes
         """
-        def disable_attributes(attributes):
-            attributes_to_be_updated = [
-                ExpenseAttribute(
-                    id=attribute.id,
-                    active=False,
-                    updated_at=datetime.now()
-                )
-                for attribute in attributes
-            ]
+        if sync_run_id:
+            return ExpenseAttribute._bulk_update_unstaged_expense_attributes(attribute_type, workspace_id, sync_run_id)
 
-            if attributes_to_be_updated:
-                logger.info(f"Updating {len(attributes_to_be_updated)} {attribute_type} in Workspace {workspace_id}")
-                ExpenseAttribute.objects.bulk_update(
-                    attributes_to_be_updated, fields=['active', 'updated_at'], batch_size=50)
+        with transaction.atomic():
+            expense_attributes_deletion_cache = ExpenseAttributesDeletionCache.objects.select_for_update().only(
+                'id').get(workspace_id=workspace_id)
 
-        expense_attributes_deletion_cache = ExpenseAttributesDeletionCache.objects.get(workspace_id=workspace_id)
+            with connection.cursor() as cursor:
+                if attribute_type in DELETION_CACHE_FIELD_MAP:
+                    cache_field, attribute_field = DELETION_CACHE_FIELD_MAP[attribute_type]
 
-        if attribute_type == 'CATEGORY':
-            deleted_attributes = ExpenseAttribute.objects.filter(
-                attribute_type=attribute_type, workspace_id=workspace_id, active=True
-            ).exclude(source_id__in=expense_attributes_deletion_cache.category_ids)
-            expense_attributes_deletion_cache.category_ids = []
-            expense_attributes_deletion_cache.updated_at = datetime.now(timezone.utc)
-            expense_attributes_deletion_cache.save(update_fields=['category_ids', 'updated_at'])
-            disable_attributes(deleted_attributes)
-
-        elif attribute_type == 'PROJECT':
-            deleted_attributes = ExpenseAttribute.objects.filter(
-                attribute_type=attribute_type, workspace_id=workspace_id, active=True
-            ).exclude(source_id__in=expense_attributes_deletion_cache.project_ids)
-            expense_attributes_deletion_cache.project_ids = []
-            expense_attributes_deletion_cache.updated_at = datetime.now(timezone.utc)
-            expense_attributes_deletion_cache.save(update_fields=['project_ids', 'updated_at'])
-            disable_attributes(deleted_attributes)
-
-        elif attribute_type == 'COST_CENTER':
-            deleted_attributes = ExpenseAttribute.objects.filter(
-                attribute_type=attribute_type, workspace_id=workspace_id, active=True
-            ).exclude(source_id__in=expense_attributes_deletion_cache.cost_center_ids)
-            expense_attributes_deletion_cache.cost_center_ids = []
-            expense_attributes_deletion_cache.updated_at = datetime.now(timezone.utc)
-            expense_attributes_deletion_cache.save(update_fields=['cost_center_ids', 'updated_at'])
-            disable_attributes(deleted_attributes)
-
-        elif attribute_type == 'MERCHANT':
-            deleted_attributes = ExpenseAttribute.objects.filter(
-                attribute_type=attribute_type, workspace_id=workspace_id, active=True
-            ).exclude(value__in=expense_attributes_deletion_cache.merchant_list)
-            expense_attributes_deletion_cache.merchant_list = []
+                    cursor.execute(
+                        EXPENSE_ATTRIBUTES_DISABLE_DELETED_QUERY.format(
+                            cache_field=cache_field, attribute_field=attribute_field),
+                        {'workspace_id': workspace_id, 'attribute_type': attribute_type}
+                    )
+                    disabled_counts = {attribute_type: cursor.rowcount}
+                else:
+                    cache_field = 'custom_field_list'
+
+                    cursor.execute(EXPENSE_ATTRIBUTES_DISABLE_DELETED_CUSTOM_FIELDS_QUERY, {'workspace_id': workspace_id})
+                    disabled_counts = dict(cursor.fetchall())
+
+            for disabled_attribute_type, disabled_count in disabled_counts.items():
+                if disabled_count:
+                    logger.info("Updating %s %s in Workspace %s", disabled_count, disabled_attribute_type, workspace_id)
+
+            setattr(expense_attributes_deletion_cache, cache_field, [])
             expense_attributes_deletion_cache.updated_at = datetime.now(timezone.utc)
-            expense_attributes_deletion_cache.save(update_fields=['merchant_list', 'updated_at'])
-            disable_attributes(deleted_attributes)
+            expense_attributes_deletion_cache.save(update_fields=[cache_field, 'updated_at'])
 
+        return sum(disabled_counts.values())
+
+    @staticmethod
+    def _bulk_update_unstaged_expense_attributes(attribute_type: str, workspace_id: int, sync_run_id: str) -> int:
+        """
+        Disable attributes that were not staged in ExpenseAttributesDeletionStaging during a sync run
+        An attribute type with nothing staged is skipped, since an unlogged table is emptied after a crash
+        :param attribute_type: Attribute type
+        :param workspace_id: Workspace Id
+        :param sync_run_id: Identifier of the sync run
+        :return: Number of disabled attributes
+        """
+        staged_attributes = ExpenseAttributesDeletionStaging.objects.filter(
+            workspace_id=workspace_id, sync_run_id=sync_run_id)
+        expired_staged_attributes = ExpenseAttributesDeletionStaging.objects.filter(
+            workspace_id=workspace_id, created_at__lt=datetime.now(timezone.utc) - DELETION_STAGING_MAX_AGE
+        ).exclude(sync_run_id=sync_run_id)
+
+        if attribute_type in DELETION_CACHE_FIELD_MAP:
+            attribute_types = [attribute_type] if staged_attributes.filter(attribute_type=attribute_type).exists() else []
+            expired_staged_attributes = expired_staged_attributes.filter(attribute_type=attribute_type)
         else:
-            for items in expense_attributes_deletion_cache.custom_field_list:
-                attribute_type = items['attribute_type']
-                value_list = items['value_list']
-                deleted_attributes = ExpenseAttribute.objects.filter(
-                    attribute_type=attribute_type, workspace_id=workspace_id, active=True
-                ).exclude(value__in=value_list)
-                disable_attributes(deleted_attributes)
-
-            expense_attributes_deletion_cache.custom_field_list = []
-            expense_attributes_deletion_cache.updated_at = datetime.now(timezone.utc)
-            expense_attributes_deletion_cache.save(update_fields=['custom_field_list', 'updated_at'])
+            attribute_types = list(
+                staged_attributes.exclude(attribute_type__in=DELETION_CACHE_FIELD_MAP.keys())
+                .values_list('attribute_type', flat=True).distinct()
+            )
+            expired_staged_attributes = expired_staged_attributes.exclude(attribute_type__in=DELETION_CACHE_FIELD_MAP.keys())
+
+        # Runs that crashed or were never reconciled do not clean up after themselves
+        expired_count, _ = expired_staged_attributes.delete()
+        if expired_count:
+            logger.info("Deleted %s expired staged %s in Workspace %s", expired_count, attribute_type, workspace_id)
+
+        if not attribute_types:
+            logger.info("No %s staged for sync run %s in Workspace %s, skipping", attribute_type, sync_run_id, workspace_id)
+            return 0
+
+        params = {'workspace_id': workspace_id, 'sync_run_id': sync_run_id}
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if attribute_type in DELETION_CACHE_FIELD_MAP:
+                    _, attribute_field = DELETION_CACHE_FIELD_MAP[attribute_type]
+
+                    cursor.execute(
+                        EXPENSE_ATTRIBUTES_DISABLE_UNSTAGED_QUERY.format(attribute_field=attribute_field),
+                        {**params, 'attribute_type': attribute_type}
+                    )
+                    disabled_counts = {attribute_type: cursor.rowcount}
+                else:
+                    cursor.execute(
+                        EXPENSE_ATTRIBUTES_DISABLE_UNSTAGED_CUSTOM_FIELDS_QUERY, {**params, 'attribute_types': attribute_types})
+                    disabled_counts = dict(cursor.fetchall())
+
+            staged_attributes.filter(attribute_type__in=attribute_types).delete()
+
+        for disabled_attribute_type, disabled_count in disabled_counts.items():
+            if disabled_count:
+                logger.info("Updating %s %s in Workspace %s", disabled_count, disabled_attribute_type, workspace_id)
+
+        return sum(disabled_counts.values())
 
     @staticmethod
     def bulk_create_or_update_expense_attributes(
-            attributes: List[Dict], attribute_type: str, workspace_id: int, update: bool = False):
+            attributes: Iterable[Dict], attribute_type: str, workspace_id: int, update: bool = False):
         """
         Create Expense Attributes in bulk
+        Attributes are consumed lazily in windows of ATTRIBUTES_SYNC_BATCH_SIZE, so generators are supported
         :param update: Update Pre-existing records or not
         :param attribute_type: Attribute type
         :param attributes: attributes = [{
@@ -261,18 +420,32 @@ class ExpenseAttribute(models.Model):
         :param workspace_id: Workspace Id
         :return: created / updated attributes
         """
+        for attributes_batch in iterate_in_batches(attributes, ATTRIBUTES_SYNC_BATCH_SIZE):
+            ExpenseAttribute._bulk_create_or_update_expense_attributes_batch(
+                attributes_batch, attribute_type, workspace_id, update)
+
+    @staticmethod
+    def _bulk_create_or_update_expense_attributes_batch(
+            attributes: List[Dict], attribute_type: str, workspace_id: int, update: bool = False):
+        """
+        Create / update a single window of Expense Attributes
+        :param attributes: attributes window
+        :param attribute_type: Attribute type
+        :param workspace_id: Workspace Id
+        :param update: Update Pre-existing records or not
+        """
         attribute_value_list = [attribute['value'] for attribute in attributes]
 
         existing_attributes = ExpenseAttribute.objects.filter(
             value__in=attribute_value_list, attribute_type=attribute_type,
             workspace_id=workspace_id).values('id', 'value', 'detail', 'active')
 
-        existing_attribute_values = []
+        existing_attribute_values = set()
 
         primary_key_map = {}
 
         for existing_attribute in existing_attributes:
-            existing_attribute_values.append(existing_attribute['value'])
+            existing_attribute_values.add(existing_attribute['value'])
             primary_key_map[existing_attribute['value']] = {
                 'id': existing_attribute['id'],
                 'detail': existing_attribute['detail'],
@@ -282,10 +455,10 @@ class ExpenseAttribute(models.Model):
         attributes_to_be_created = []
         attributes_to_be_updated = []
 
-        values_appended = []
+        values_appended = set()
         for attribute in attributes:
             if attribute['value'] not in existing_attribute_values and attribute['value'] not in values_appended:
-                values_appended.append(attribute['value'])
+                values_appended.add(attribute['value'])
                 attributes_to_be_created.append(
                     ExpenseAttribute(
                         attribute_type=attribute_type,
@@ -314,6 +487,144 @@ class ExpenseAttribute(models.Model):
             ExpenseAttribute.objects.bulk_update(
                 attributes_to_be_updated, fields=['source_id', 'detail', 'active'], batch_size=50)
 
+    @staticmethod
+    def get_staged_expense_attributes(attributes: Iterable[Dict], attribute_type: str, workspace_id: int) -> List[Dict]:
+        """
+        Rows staged by EXPENSE_ATTRIBUTES_UPSERT_QUERY
+        ON CONFLICT cannot touch the same row twice in one statement, last occurrence of a value wins
+        """
+        staged_attributes = {
+            attribute['value']: {
+                'attribute_type': attribute_type,
+                'display_name': attribute['display_name'],
+                'value': attribute['value'],
+                'source_id': attribute['source_id'],
+                'workspace_id': workspace_id,
+                'active': attribute['active'] if 'active' in attribute else None,
+                'detail': attribute['detail'] if 'detail' in attribute else None
+            }
+            for attribute in attributes
+        }
+
+        return list(staged_attributes.values())
+
+    @staticmethod
+    def bulk_upsert_expense_attributes(
+            attributes: Iterable[Dict], attribute_type: str, workspace_id: int, update: bool = False) -> Dict[str, int]:
+        """
+        Upsert Expense Attributes in bulk with INSERT ... ON CONFLICT (value, attribute_type, workspace_id)
+        Rows whose source_id / detail / active did not change are left untouched
+        :param update: Update Pre-existing records or not
+        :param attribute_type: Attribute type
+        :param attributes: attributes = [{
+            'attribute_type': Type of attribute,
+            'display_name': Display_name of attribute_field,
+            'value': Value of attribute,
+            'source_id': Fyle Id of the attribute,
+            'detail': Extra Details of the attribute
+        }]
+        :param workspace_id: Workspace Id
+        :return: {'created': count, 'updated': count, 'unchanged': count}
+        """
+        query = EXPENSE_ATTRIBUTES_UPSERT_QUERY.format(
+            conflict_action=EXPENSE_ATTRIBUTES_UPSERT_UPDATE_ACTION if update else EXPENSE_ATTRIBUTES_UPSERT_SKIP_ACTION
+        )
+
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+
+        with connection.cursor() as cursor:
+            for attributes_batch in iterate_in_batches(attributes, ATTRIBUTES_UPSERT_BATCH_SIZE):
+                staged_attributes = ExpenseAttribute.get_staged_expense_attributes(attributes_batch, attribute_type, workspace_id)
+
+                cursor.execute(query, {'rows': json.dumps(staged_attributes)})
+                counts['unchanged'] += len(staged_attributes)
+
+                for _, _, created_count, updated_count in cursor.fetchall():
+                    counts['created'] += created_count
+                    counts['updated'] += updated_count
+                    counts['unchanged'] -= created_count + updated_count
+
+        logger.info("Upserted %s in Workspace %s - %s", attribute_type, workspace_id, counts)
+
+        return counts
+
+    @staticmethod
+    def bulk_upsert_expense_attributes_for_workspaces(payloads: List[Dict], update: bool = False) -> Dict[tuple, Dict]:
+        """
+        Upsert Expense Attributes of many (workspace_id, attribute_type) pairs with combined INSERT ... ON CONFLICT statements
+        A failing statement is retried pair by pair, so an error only fails the pairs it comes from,
+        rows of a failing pair written by earlier statements are kept and versioned like any other committed write
+        :param payloads: [{
+            'workspace_id': Workspace Id,
+            'attribute_type': Attribute type,
+            'attributes': Iterable of attributes as in bulk_upsert_expense_attributes
+        }]
+        :param update: Update Pre-existing records or not
+        :return: {(workspace_id, attribute_type): {'created': count, 'updated': count, 'unchanged': count} or {'error': message}}
+        """
+        query = EXPENSE_ATTRIBUTES_UPSERT_QUERY.format(
+            conflict_action=EXPENSE_ATTRIBUTES_UPSERT_UPDATE_ACTION if update else EXPENSE_ATTRIBUTES_UPSERT_SKIP_ACTION
+        )
+
+        results = {}
+        staged_attributes = []
+
+        for pair, payload in get_workspaces_sync_payloads(payloads, results).items():
+            try:
+                staged_pair_attributes = ExpenseAttribute.get_staged_expense_attributes(
+                    payload['attributes'], payload['attribute_type'], payload['workspace_id']
+                )
+            except (KeyError, TypeError) as exception:
+                results[pair] = {'error': f'Invalid attributes payload - {exception}'}
+                continue
+
+            results[pair] = {'created': 0, 'updated': 0, 'unchanged': len(staged_pair_attributes)}
+            staged_attributes.extend(staged_pair_attributes)
+
+        def upsert(rows: List[Dict]) -> List[tuple]:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(query, {'rows': json.dumps(rows)})
+                return cursor.fetchall()
+
+        for attributes_batch in iterate_in_batches(staged_attributes, ATTRIBUTES_UPSERT_BATCH_SIZE):
+            # Pairs failed in an earlier statement or duplicated in the payloads are not written any further
+            attributes_batch = [
+                staged_attribute for staged_attribute in attributes_batch
+                if 'error' not in results[(staged_attribute['workspace_id'], staged_attribute['attribute_type'])]
+            ]
+            if not attributes_batch:
+                continue
+
+            try:
+                pair_counts = upsert(attributes_batch)
+            except DatabaseError as exception:
+                logger.info("Combined upsert of %s attributes failed, retrying per workspace - %s", len(attributes_batch), exception)
+                pair_counts = []
+
+                batch_rows_by_pair = {}
+                for staged_attribute in attributes_batch:
+                    pair = (staged_attribute['workspace_id'], staged_attribute['attribute_type'])
+                    batch_rows_by_pair.setdefault(pair, []).append(staged_attribute)
+
+                for pair, rows in batch_rows_by_pair.items():
+                    if 'error' in results[pair]:
+                        continue
+                    try:
+                        pair_counts.extend(upsert(rows))
+                    except DatabaseError as pair_exception:
+                        logger.error("Error upserting %s in Workspace %s - %s", pair[1], pair[0], pair_exception)
+                        results[pair] = {'error': str(pair_exception)}
+
+            for workspace_id, attribute_type, created_count, updated_count in pair_counts:
+                result = results[(workspace_id, attribute_type)]
+                result['created'] += created_count
+                result['updated'] += updated_count
+                result['unchanged'] -= created_count + updated_count
+
+        logger.info("Upserted Expense Attributes of %s workspace attribute types", len(results))
+
+        return results
+
     @staticmethod
     def get_last_synced_at(attribute_type: str, workspace_id: int):
         """
@@ -343,6 +654,8 @@ class DestinationAttribute(models.Model):
     active = models.BooleanField(null=True, help_text='Indicates whether the fields is active or not')
     detail = JSONField(help_text='Detailed destination attributes payload', null=True)
     code = models.CharField(max_length=255, help_text='Code of the attribute', null=True)
+    fingerprint = models.CharField(max_length=32, null=True, help_text='Hash of the syncable fields of the attribute')
+    sync_run_id = models.CharField(max_length=255, null=True, help_text='Identifier of the last sync run that returned the attribute')
     created_at = models.DateTimeField(auto_now_add=True, help_text='Created at datetime')
     updated_at = models.DateTimeField(auto_now=True, help_text='Updated at datetime')
 
@@ -351,8 +664,30 @@ class DestinationAttribute(models.Model):
         unique_together = ('destination_id', 'attribute_type', 'workspace', 'display_name')
         indexes = [
             models.Index(fields=['workspace_id', 'attribute_type']),
+            GinIndex(OpClass(Upper('value'), name='gin_trgm_ops'), name='fyle_accoun_value_da_trgm_idx'),
+            GinIndex(OpClass(Upper('code'), name='gin_trgm_ops'), name='fyle_accoun_code_da_trgm_idx'),
         ]
 
+    @staticmethod
+    def get_fingerprint(attribute: Dict) -> str:
+        """
+        Hash of the syncable fields (value, detail, active, code) of an attribute payload
+        Any update changing these fields without writing the fingerprint has it cleared by the
+        destination_attributes_clear_fingerprint trigger, so the attribute is updated by the next fingerprint sync
+        :param attribute: attribute dict, same format as bulk_create_or_update_destination_attributes
+        :return: md5 hex digest
+        """
+        syncable_fields = [
+            attribute['value'],
+            attribute['detail'] if 'detail' in attribute else None,
+            attribute['active'] if 'active' in attribute else None,
+            " ".join(attribute['code'].split()) if 'code' in attribute and attribute['code'] else None
+        ]
+
+        return hashlib.md5(
+            json.dumps(syncable_fields, sort_keys=True, default=str).encode('utf-8'), usedforsecurity=False
+        ).hexdigest()
+
     @staticmethod
     def create_or_update_destination_attribute(attribute: Dict, workspace_id):
         """
@@ -374,7 +709,7 @@ class DestinationAttribute(models.Model):
 
     @staticmethod
     def bulk_create_or_update_destination_attributes(
-        attributes: List[Dict],
+        attributes: Iterable[Dict],
         attribute_type: str,
         workspace_id: int,
         update: bool = False,
@@ -382,13 +717,15 @@ class DestinationAttribute(models.Model):
         attribute_disable_callback_path: str = None,
         is_import_to_fyle_enabled: bool = False,
         app_name: str = None,
-        skip_deletion: bool = False
+        skip_deletion: bool = False,
+        use_fingerprint: bool = False,
+        sync_run_id: str = None
     ):
         """
         Create or update Destination Attributes in bulk
 
         Parameters:
-        - attributes: List of attribute dicts to be synced. Format:
+        - attributes: Iterable (list / generator) of attribute dicts to be synced. Format:
             {
                 'attribute_type': str,
                 'display_name': str,
@@ -408,6 +745,9 @@ class DestinationAttribute(models.Model):
         - skip_deletion: If True, skip disabling of attributes in Fyle (for deletion then recreation case)
                         Attributes such as COST_CODE have duplicate values belonging to different projects,
                         we would skip the deletion of these attributes
+        - use_fingerprint: If True, detect changed attributes by comparing the stored fingerprint only
+        - sync_run_id: Optional, token of the current sync run stamped on every synced attribute,
+                       call disable_unsynced_destination_attributes once the run is complete
         """
         # if app_name and app_name in ['Sage 300', 'QBD_CONNECTOR', 'NETSUITE', 'XERO', 'QUICKBOOKS', 'INTACCT']:
         #     DestinationAttribute.bulk_create_or_update_destination_attributes_with_delete_case(
@@ -422,14 +762,16 @@ class DestinationAttribute(models.Model):
         #         app_name=app_name
         #     )
         # else:
-        DestinationAttribute.bulk_create_or_update_destination_attributes_without_delete_case(
+        return DestinationAttribute.bulk_create_or_update_destination_attributes_without_delete_case(
             attributes=attributes,
             attribute_type=attribute_type,
             workspace_id=workspace_id,
             update=update,
             display_name=display_name,
             attribute_disable_callback_path=attribute_disable_callback_path,
-            is_import_to_fyle_enabled=is_import_to_fyle_enabled
+            is_import_to_fyle_enabled=is_import_to_fyle_enabled,
+            use_fingerprint=use_fingerprint,
+            sync_run_id=sync_run_id
         )
 
     @staticmethod
@@ -518,6 +860,7 @@ class DestinationAttribute(models.Model):
                                 detail=attribute.get('detail'),
                                 active=attribute.get('active'),
                                 code=" ".join(attribute['code'].split()) if attribute.get('code') else None,
+                                fingerprint=DestinationAttribute.get_fingerprint(attribute),
                                 updated_at=datetime.now()
                             )
                         )
@@ -532,7 +875,8 @@ class DestinationAttribute(models.Model):
                                 detail=attribute.get('detail'),
                                 workspace_id=workspace_id,
                                 active=attribute.get('active'),
-                                code=" ".join(attribute['code'].split()) if attribute.get('code') else None
+                                code=" ".join(attribute['code'].split()) if attribute.get('code') else None,
+                                fingerprint=DestinationAttribute.get_fingerprint(attribute)
                             )
                         )
                 else:
@@ -546,7 +890,8 @@ class DestinationAttribute(models.Model):
                             detail=attribute.get('detail'),
                             workspace_id=workspace_id,
                             active=attribute.get('active'),
-                            code=" ".join(attribute['code'].split()) if attribute.get('code') else None
+                            code=" ".join(attribute['code'].split()) if attribute.get('code') else None,
+                            fingerprint=DestinationAttribute.get_fingerprint(attribute)
                         )
                     )
                 processed_destination_ids.add(destination_id)
@@ -583,6 +928,7 @@ class DestinationAttribute(models.Model):
                             detail=attribute.get('detail'),
                             active=attribute.get('active'),
                             code=" ".join(attribute['code'].split()) if attribute.get('code') else None,
+                            fingerprint=DestinationAttribute.get_fingerprint(attribute),
                             updated_at=datetime.now()
                         )
                     )
@@ -604,7 +950,7 @@ class DestinationAttribute(models.Model):
         if attributes_to_be_updated:
             DestinationAttribute.objects.bulk_update(
                 attributes_to_be_updated,
-                fields=['destination_id', 'detail', 'value', 'active', 'updated_at', 'code'],
+                fields=['destination_id', 'detail', 'value', 'active', 'updated_at', 'code', 'fingerprint'],
                 batch_size=50
             )
 
@@ -617,19 +963,21 @@ class DestinationAttribute(models.Model):
 
     @staticmethod
     def bulk_create_or_update_destination_attributes_without_delete_case(
-        attributes: List[Dict],
+        attributes: Iterable[Dict],
         attribute_type: str,
         workspace_id: int,
         update: bool = False,
         display_name: str = None,
         attribute_disable_callback_path: str = None,
-        is_import_to_fyle_enabled: bool = False
+        is_import_to_fyle_enabled: bool = False,
+        use_fingerprint: bool = False,
+        sync_run_id: str = None
     ):
         """
         Create or update Destination Attributes in bulk
 
         Parameters:
-        - attributes: List of attribute dicts to be synced. Format:
+        - attributes: Iterable (list / generator) of attribute dicts to be synced. Format:
             {
                 'attribute_type': str,
                 'display_name': str,
@@ -645,6 +993,12 @@ class DestinationAttribute(models.Model):
         - display_name: Optional, filter for specific display_name
         - attribute_disable_callback_path: Optional dotted path to callback function
         - is_import_to_fyle_enabled: Whether Fyle import is enabled
+        - use_fingerprint: If True, existing rows are compared on their stored fingerprint only,
+                           detail is neither fetched nor compared
+        - sync_run_id: Optional, token of the current sync run stamped on every synced attribute
+
+        Attributes are consumed lazily in windows of ATTRIBUTES_SYNC_BATCH_SIZE, each window is looked up
+        and written before the next one is read, so generators are supported
         """
         is_custom_source_field = MappingSetting.objects.filter(
             workspace_id=workspace_id,
@@ -652,44 +1006,63 @@ class DestinationAttribute(models.Model):
             is_custom=True
         ).exists()
 
-        unique_attributes = {attribute['destination_id']: attribute for attribute in attributes}
-        attributes = list(unique_attributes.values())
-        attribute_destination_id_list = list(unique_attributes.keys())
-
-        filters = {
-            'destination_id__in': set(attribute_destination_id_list),
-            'attribute_type': attribute_type,
-            'workspace_id': workspace_id
-        }
-        if display_name:
-            filters['display_name'] = display_name
+        counts = {'created': 0, 'updated': 0}
 
-        existing_attributes = DestinationAttribute.objects.filter(**filters)\
-            .values('id', 'value', 'destination_id', 'detail', 'active', 'code')
+        for attributes_batch in iterate_in_batches(attributes, ATTRIBUTES_SYNC_BATCH_SIZE):
+            batch_counts = DestinationAttribute._bulk_create_or_update_destination_attributes_batch(
+                attributes=attributes_batch,
+                attribute_type=attribute_type,
+                workspace_id=workspace_id,
+                update=update,
+                display_name=display_name,
+                attribute_disable_callback_path=attribute_disable_callback_path,
+                is_import_to_fyle_enabled=is_import_to_fyle_enabled,
+                is_custom_source_field=is_custom_source_field,
+                use_fingerprint=use_fingerprint,
+                sync_run_id=sync_run_id
+            )
+            counts['created'] += batch_counts['created']
+            counts['updated'] += batch_counts['updated']
 
-        existing_attribute_destination_ids = []
+        return counts
 
-        primary_key_map = {}
+    @staticmethod
+    def get_existing_attribute_fields(use_fingerprint: bool) -> List[str]:
+        """
+        Fields of the existing rows needed to detect changes, detail is not fetched when comparing fingerprints
+        """
+        if use_fingerprint:
+            return ['id', 'value', 'destination_id', 'code', 'fingerprint']
 
-        for existing_attribute in existing_attributes:
-            existing_attribute_destination_ids.append(existing_attribute['destination_id'])
-            primary_key_map[existing_attribute['destination_id']] = {
-                'id': existing_attribute['id'],
-                'value': existing_attribute['value'],
-                'detail': existing_attribute['detail'],
-                'active': existing_attribute['active'],
-                'code': existing_attribute['code']
-            }
+        return ['id', 'value', 'destination_id', 'detail', 'active', 'code']
 
+    @staticmethod
+    def get_destination_attributes_changes(
+        attributes: List[Dict],
+        attribute_type: str,
+        workspace_id: int,
+        *,
+        primary_key_map: Dict[str, Dict],
+        update: bool,
+        attribute_disable_callback_path: str,
+        is_import_to_fyle_enabled: bool,
+        use_fingerprint: bool = False,
+        sync_run_id: str = None
+    ) -> tuple:
+        """
+        Compare unique Destination Attributes of a workspace and attribute type with their existing rows
+        :param primary_key_map: Existing rows by destination_id, with the fields of get_existing_attribute_fields
+        :return: (attributes to be created, attributes to be updated, attributes to disable in Fyle)
+        """
         attributes_to_be_created = []
         attributes_to_be_updated = []
         attributes_to_disable = {}
 
-        destination_ids_appended = []
+        destination_ids_appended = set()
         for attribute in attributes:
-            if attribute['destination_id'] not in existing_attribute_destination_ids \
+            if attribute['destination_id'] not in primary_key_map \
                     and attribute['destination_id'] not in destination_ids_appended:
-                destination_ids_appended.append(attribute['destination_id'])
+                destination_ids_appended.add(attribute['destination_id'])
                 attributes_to_be_created.append(
                     DestinationAttribute(
                         attribute_type=attribute_type,
@@ -699,7 +1072,9 @@ class DestinationAttribute(models.Model):
                         detail=attribute['detail'] if 'detail' in attribute else None,
                         workspace_id=workspace_id,
                         active=attribute['active'] if 'active' in attribute else None,
-                        code=" ".join(attribute['code'].split()) if 'code' in attribute and attribute['code'] else None
+                        code=" ".join(attribute['code'].split()) if 'code' in attribute and attribute['code'] else None,
+                        fingerprint=DestinationAttribute.get_fingerprint(attribute),
+                        sync_run_id=sync_run_id
                     )
                 )
             else:
@@ -714,12 +1089,22 @@ class DestinationAttribute(models.Model):
                         'updated_code': " ".join(attribute['code'].split()) if 'code' in attribute and attribute['code'] else None
                     }
 
-                if update and (
+                if not update:
+                    continue
+
+                fingerprint = DestinationAttribute.get_fingerprint(attribute)
+
+                if use_fingerprint:
+                    is_changed = fingerprint != primary_key_map[attribute['destination_id']]['fingerprint']
+                else:
+                    is_changed = (
                         (attribute['value'] != primary_key_map[attribute['destination_id']]['value'])
                         or ('detail' in attribute and attribute['detail'] != primary_key_map[attribute['destination_id']]['detail'])
                         or ('active' in attribute and attribute['active'] != primary_key_map[attribute['destination_id']]['active'])
                         or ('code' in attribute and attribute['code'] and attribute['code'] != primary_key_map[attribute['destination_id']]['code'])
-                ):
+                    )
+
+                if is_changed:
                     attributes_to_be_updated.append(
                         DestinationAttribute(
                             id=primary_key_map[attribute['destination_id']]['id'],
@@ -727,10 +1112,67 @@ class DestinationAttribute(models.Model):
                             detail=attribute['detail'] if 'detail' in attribute else None,
                             active=attribute['active'] if 'active' in attribute else None,
                             code=" ".join(attribute['code'].split()) if 'code' in attribute and attribute['code'] else None,
+                            fingerprint=fingerprint,
                             updated_at=datetime.now()
                         )
                     )
 
+        return attributes_to_be_created, attributes_to_be_updated, attributes_to_disable
+
+    @staticmethod
+    def _bulk_create_or_update_destination_attributes_batch(
+        attributes: List[Dict],
+        attribute_type: str,
+        workspace_id: int,
+        *,
+        update: bool,
+        display_name: str,
+        attribute_disable_callback_path: str,
+        is_import_to_fyle_enabled: bool,
+        is_custom_source_field: bool,
+        use_fingerprint: bool = False,
+        sync_run_id: str = None
+    ):
+        """
+        Create / update a single window of Destination Attributes
+        Parameters are the same as bulk_create_or_update_destination_attributes_without_delete_case
+        - is_custom_source_field: Whether the attribute type is mapped to a custom Fyle field
+
+        Returns: {'created': count, 'updated': count}
+        """
+        unique_attributes = {attribute['destination_id']: attribute for attribute in attributes}
+        attributes = list(unique_attributes.values())
+        attribute_destination_id_list = list(unique_attributes.keys())
+
+        filters = {
+            'destination_id__in': set(attribute_destination_id_list),
+            'attribute_type': attribute_type,
+            'workspace_id': workspace_id
+        }
+        if display_name:
+            filters['display_name'] = display_name
+
+        existing_attributes = DestinationAttribute.objects.filter(**filters)\
+            .values(*DestinationAttribute.get_existing_attribute_fields(use_fingerprint))
+
+        primary_key_map = {}
+
+        for existing_attribute in existing_attributes:
+            primary_key_map[existing_attribute['destination_id']] = existing_attribute
+
+        attributes_to_be_created, attributes_to_be_updated, attributes_to_disable = \
+            DestinationAttribute.get_destination_attributes_changes(
+                attributes=attributes,
+                attribute_type=attribute_type,
+                workspace_id=workspace_id,
+                primary_key_map=primary_key_map,
+                update=update,
+                attribute_disable_callback_path=attribute_disable_callback_path,
+                is_import_to_fyle_enabled=is_import_to_fyle_enabled,
+                use_fingerprint=use_fingerprint,
+                sync_run_id=sync_run_id
+            )
+
         if attribute_disable_callback_path and attributes_to_disable:
             import_string(attribute_disable_callback_path)(
                 workspace_id=workspace_id,
@@ -744,7 +1186,13 @@ class DestinationAttribute(models.Model):
 
         if attributes_to_be_updated:
             DestinationAttribute.objects.bulk_update(
-                attributes_to_be_updated, fields=['detail', 'value', 'active', 'updated_at', 'code'], batch_size=50)
+                attributes_to_be_updated, fields=['detail', 'value', 'active', 'updated_at', 'code', 'fingerprint'], batch_size=50)
+
+        if sync_run_id:
+            # Stamp the run token on existing rows of the window, unchanged rows included, without touching updated_at
+            DestinationAttribute.objects.filter(
+                id__in=[existing_attribute['id'] for existing_attribute in primary_key_map.values()]
+            ).exclude(sync_run_id=sync_run_id).update(sync_run_id=sync_run_id)
 
         if is_custom_source_field and attributes_to_disable:
             import_string('fyle_integrations_imports.modules.expense_custom_fields.disable_expense_custom_fields')(
@@ -753,6 +1201,299 @@ class DestinationAttribute(models.Model):
                 attributes_to_disable=attributes_to_disable
             )
 
+        return {'created': len(attributes_to_be_created), 'updated': len(attributes_to_be_updated)}
+
+    @staticmethod
+    def bulk_create_or_update_destination_attributes_for_workspaces(
+        payloads: List[Dict],
+        update: bool = False,
+        use_fingerprint: bool = False,
+        sync_run_id: str = None
+    ) -> Dict[tuple, Dict]:
+        """
+        Create or update Destination Attributes of many (workspace_id, attribute_type) pairs
+        Custom field settings and existing rows of all the pairs of a window are read in one query each,
+        rows are written with combined statements, a failing write is retried pair by pair
+
+        Parameters:
+        - payloads: [{
+                'workspace_id': int,
+                'attribute_type': str,
+                'attributes': Iterable of attribute dicts as in bulk_create_or_update_destination_attributes,
+                'display_name': Optional, filter for specific display_name,
+                'attribute_disable_callback_path': Optional dotted path to callback function,
+                'is_import_to_fyle_enabled': Optional, whether Fyle import is enabled
+            }]
+        - update: If True, update existing attributes if changed
+        - use_fingerprint: If True, detect changed attributes by comparing the stored fingerprint only
+        - sync_run_id: Optional, token of the current sync run stamped on every synced attribute
+
+        Pairs with more than ATTRIBUTES_SYNC_BATCH_SIZE attributes go through the windowed per-workspace sync,
+        windows written before a failing one are kept and versioned like any other committed write
+
+        Returns: {(workspace_id, attribute_type): {'created': count, 'updated': count} or {'error': message}}
+        """
+        results = {}
+        payloads_by_pair = get_workspaces_sync_payloads(payloads, results)
+
+        custom_source_fields = set(MappingSetting.objects.filter(
+            workspace_id__in={workspace_id for workspace_id, _ in payloads_by_pair},
+            destination_field__in={attribute_type for _, attribute_type in payloads_by_pair},
+            is_custom=True
+        ).values_list('workspace_id', 'destination_field'))
+
+        payloads_window = []
+        window_size = 0
+
+        for pair, payload in payloads_by_pair.items():
+            if len(payload['attributes']) > ATTRIBUTES_SYNC_BATCH_SIZE:
+                try:
+                    results[pair] = DestinationAttribute.bulk_create_or_update_destination_attributes_without_delete_case(
+                        attributes=payload['attributes'],
+                        attribute_type=payload['attribute_type'],
+                        workspace_id=payload['workspace_id'],
+                        update=update,
+                        display_name=payload.get('display_name'),
+                        attribute_disable_callback_path=payload.get('attribute_disable_callback_path'),
+                        is_import_to_fyle_enabled=payload.get('is_import_to_fyle_enabled', False),
+                        use_fingerprint=use_fingerprint,
+                        sync_run_id=sync_run_id
+                    )
+                except Exception as exception:
+                    logger.error("Error syncing %s in Workspace %s - %s", pair[1], pair[0], exception)
+                    results[pair] = {'error': str(exception)}
+                continue
+
+            if payloads_window and window_size + len(payload['attributes']) > ATTRIBUTES_SYNC_BATCH_SIZE:
+                DestinationAttribute._bulk_create_or_update_destination_attributes_for_workspaces_batch(
+                    payloads_window, update=update, use_fingerprint=use_fingerprint, sync_run_id=sync_run_id,
+                    custom_source_fields=custom_source_fields, results=results
+                )
+                payloads_window = []
+                window_size = 0
+
+            payloads_window.append(payload)
+            window_size += len(payload['attributes'])
+
+        if payloads_window:
+            DestinationAttribute._bulk_create_or_update_destination_attributes_for_workspaces_batch(
+                payloads_window, update=update, use_fingerprint=use_fingerprint, sync_run_id=sync_run_id,
+                custom_source_fields=custom_source_fields, results=results
+            )
+
+        return results
+
+    @staticmethod
+    def _bulk_create_or_update_destination_attributes_for_workspaces_batch(
+        payloads: List[Dict],
+        *,
+        update: bool,
+        use_fingerprint: bool,
+        sync_run_id: str,
+        custom_source_fields: Set[tuple],
+        results: Dict[tuple, Dict]
+    ):
+        """
+        Create / update a window of payloads of distinct pairs, results of the pairs are set in results
+        Parameters are the same as bulk_create_or_update_destination_attributes_for_workspaces
+        - custom_source_fields: (workspace_id, attribute_type) pairs mapped to a custom Fyle field
+        """
+        unique_attributes_by_pair = {}
+        existing_attributes_filter = Q()
+
+        for payload in payloads:
+            pair = (payload['workspace_id'], payload['attribute_type'])
+            try:
+                unique_attributes_by_pair[pair] = {attribute['destination_id']: attribute for attribute in payload['attributes']}
+            except (KeyError, TypeError) as exception:
+                results[pair] = {'error': f'Invalid attributes payload - {exception}'}
+                continue
+
+            pair_filter = Q(
+                workspace_id=payload['workspace_id'],
+                attribute_type=payload['attribute_type'],
+                destination_id__in=set(unique_attributes_by_pair[pair])
+            )
+            if payload.get('display_name'):
+                pair_filter &= Q(display_name=payload['display_name'])
+            existing_attributes_filter |= pair_filter
+
+        primary_key_maps = {pair: {} for pair in unique_attributes_by_pair}
+
+        if unique_attributes_by_pair:
+            existing_attributes = DestinationAttribute.objects.filter(existing_attributes_filter).values(
+                'workspace_id', 'attribute_type', *DestinationAttribute.get_existing_attribute_fields(use_fingerprint)
+            )
+            for existing_attribute in existing_attributes:
+                pair = (existing_attribute.pop('workspace_id'), existing_attribute.pop('attribute_type'))
+                primary_key_maps[pair][existing_attribute['destination_id']] = existing_attribute
+
+        changes_by_pair = {}
+
+        for payload in payloads:
+            pair = (payload['workspace_id'], payload['attribute_type'])
+            if pair not in unique_attributes_by_pair:
+                continue
+
+            try:
+                attributes_to_be_created, attributes_to_be_updated, attributes_to_disable = \
+                    DestinationAttribute.get_destination_attributes_changes(
+                        attributes=list(unique_attributes_by_pair[pair].values()),
+                        attribute_type=payload['attribute_type'],
+                        workspace_id=payload['workspace_id'],
+                        primary_key_map=primary_key_maps[pair],
+                        update=update,
+                        attribute_disable_callback_path=payload.get('attribute_disable_callback_path'),
+                        is_import_to_fyle_enabled=payload.get('is_import_to_fyle_enabled', False),
+                        use_fingerprint=use_fingerprint,
+                        sync_run_id=sync_run_id
+                    )
+
+                if payload.get('attribute_disable_callback_path') and attributes_to_disable:
+                    import_string(payload['attribute_disable_callback_path'])(
+                        workspace_id=payload['workspace_id'],
+                        attributes_to_disable=attributes_to_disable,
+                        is_import_to_fyle_enabled=payload.get('is_import_to_fyle_enabled', False),
+                        attribute_type=payload['attribute_type']
+                    )
+            except Exception as exception:
+                logger.error("Error syncing %s in Workspace %s - %s", pair[1], pair[0], exception)
+                results[pair] = {'error': str(exception)}
+                continue
+
+            changes_by_pair[pair] = (attributes_to_be_created, attributes_to_be_updated, attributes_to_disable)
+
+        def write_changes(pairs: List[tuple]):
+            attributes_to_be_created = [attribute for pair in pairs for attribute in changes_by_pair[pair][0]]
+            attributes_to_be_updated = [attribute for pair in pairs for attribute in changes_by_pair[pair][1]]
+            existing_attribute_ids = [
+                existing_attribute['id'] for pair in pairs for existing_attribute in primary_key_maps[pair].values()
+            ]
+
+            with transaction.atomic():
+                if attributes_to_be_created:
+                    DestinationAttribute.objects.bulk_create(attributes_to_be_created, batch_size=ATTRIBUTES_SYNC_BATCH_SIZE)
+
+                if attributes_to_be_updated:
+                    DestinationAttribute.objects.bulk_update(
+                        attributes_to_be_updated,
+                        fields=['detail', 'value', 'active', 'updated_at', 'code', 'fingerprint'],
+                        batch_size=50
+                    )
+
+                if sync_run_id and existing_attribute_ids:
+                    DestinationAttribute.objects.filter(
+                        id__in=existing_attribute_ids
+                    ).exclude(sync_run_id=sync_run_id).update(sync_run_id=sync_run_id)
+
+        try:
+            write_changes(list(changes_by_pair))
+            written_pairs = list(changes_by_pair)
+        except DatabaseError as exception:
+            logger.info("Combined write of %s attribute syncs failed, retrying per workspace - %s", len(changes_by_pair), exception)
+            written_pairs = []
+            for pair in changes_by_pair:
+                try:
+                    write_changes([pair])
+                    written_pairs.append(pair)
+                except DatabaseError as pair_exception:
+                    logger.error("Error syncing %s in Workspace %s - %s", pair[1], pair[0], pair_exception)
+                    results[pair] = {'error': str(pair_exception)}
+
+        for pair in written_pairs:
+            workspace_id, attribute_type = pair
+            attributes_to_be_created, attributes_to_be_updated, attributes_to_disable = changes_by_pair[pair]
+            results[pair] = {'created': len(attributes_to_be_created), 'updated': len(attributes_to_be_updated)}
+
+            if pair in custom_source_fields and attributes_to_disable:
+                try:
+                    import_string('fyle_integrations_imports.modules.expense_custom_fields.disable_expense_custom_fields')(
+                        workspace_id=workspace_id,
+                        attribute_type=attribute_type,
+                        attributes_to_disable=attributes_to_disable
+                    )
+                except Exception as exception:
+                    logger.error("Error disabling custom field %s in Workspace %s - %s", attribute_type, workspace_id, exception)
+                    results[pair] = {'error': str(exception)}
+
+    @staticmethod
+    def disable_unsynced_destination_attributes(
+        attribute_type: str,
+        workspace_id: int,
+        sync_run_id: str,
+        *,
+        display_name: str = None,
+        attribute_disable_callback_path: str = None,
+        is_import_to_fyle_enabled: bool = False
+    ) -> int:
+        """
+        Disable the attributes that were not returned by the destination in a sync run
+        Should be called once all the windows of a run have gone through bulk_create_or_update_destination_attributes
+        :param attribute_type: Attribute type
+        :param workspace_id: Workspace Id
+        :param sync_run_id: Token of the completed sync run
+        :param display_name: Optional, filter for specific display_name
+        :param attribute_disable_callback_path: Optional dotted path to callback function
+        :param is_import_to_fyle_enabled: Whether Fyle import is enabled
+        :return: Number of disabled attributes
+        """
+        filters = {
+            'attribute_type': attribute_type,
+            'workspace_id': workspace_id,
+            'sync_run_id': sync_run_id
+        }
+        if display_name:
+            filters['display_name'] = display_name
+
+        # A run that stamped nothing most likely failed to fetch, sweeping it would disable every attribute
+        if not DestinationAttribute.objects.filter(**filters).exists():
+            logger.info("No %s synced in run %s for Workspace %s, skipping", attribute_type, sync_run_id, workspace_id)
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(DESTINATION_ATTRIBUTES_DISABLE_UNSYNCED_QUERY, {
+                'attribute_type': attribute_type,
+                'workspace_id': workspace_id,
+                'display_name': display_name,
+                'sync_run_id': sync_run_id
+            })
+            disabled_attributes = cursor.fetchall()
+
+        if not disabled_attributes:
+            return 0
+
+        logger.info("Disabled %s %s in Workspace %s", len(disabled_attributes), attribute_type, workspace_id)
+
+        attributes_to_disable = {
+            destination_id: {
+                'value': value,
+                'updated_value': None,
+                'code': code,
+                'updated_code': None
+            } for destination_id, value, code in disabled_attributes
+        }
+
+        if attribute_disable_callback_path and is_import_to_fyle_enabled:
+            import_string(attribute_disable_callback_path)(
+                workspace_id=workspace_id,
+                attributes_to_disable=attributes_to_disable,
+                is_import_to_fyle_enabled=is_import_to_fyle_enabled,
+                attribute_type=attribute_type
+            )
+
+        if is_import_to_fyle_enabled and MappingSetting.objects.filter(
+            workspace_id=workspace_id,
+            destination_field=attribute_type,
+            is_custom=True
+        ).exists():
+            import_string('fyle_integrations_imports.modules.expense_custom_fields.disable_expense_custom_fields')(
+                workspace_id=workspace_id,
+                attribute_type=attribute_type,
+                attributes_to_disable=attributes_to_disable
+            )
+
+        return len(disabled_attributes)
+
 
 class ExpenseField(models.Model):
     """
@@ -775,21 +1516,62 @@ class ExpenseField(models.Model):
     def create_or_update_expense_fields(attributes: List[Dict], fields_included: List[str], workspace_id):
         """
         Update or Create Expense Fields
+        :return: Last expense field of the payload that was upserted, None if no field was included
+        """
+        expense_fields = ExpenseField.bulk_upsert_expense_fields(attributes, fields_included, workspace_id)['expense_fields']
+
+        return expense_fields[-1] if expense_fields else None
+
+    @staticmethod
+    def bulk_upsert_expense_fields(attributes: List[Dict], fields_included: List[str], workspace_id: int) -> Dict[str, List]:
+        """
+        Upsert Expense Fields in bulk with INSERT ... ON CONFLICT (attribute_type, workspace_id)
+        :param attributes: Fyle expense fields payload
+        :param fields_included: Field names to be upserted, DEPENDENT_SELECT fields are always upserted
+        :param workspace_id: Workspace Id
+        :return: {
+            'expense_fields': Upserted expense fields in the order of the payload,
+            'changed_expense_fields': Expense fields created or whose source_field_id / is_enabled changed
+        }
         """
-        # Looping over Expense Field Values
-        expense_fields = None
+        # ON CONFLICT cannot touch the same row twice in one statement, last occurrence of a field wins
+        staged_expense_fields = {}
         for expense_field in attributes:
             if expense_field['field_name'] in fields_included or expense_field['type'] == 'DEPENDENT_SELECT':
-                expense_fields, _ = ExpenseField.objects.update_or_create(
-                    attribute_type=expense_field['field_name'].replace(' ', '_').upper(),
-                    workspace_id=workspace_id,
-                    defaults={
-                        'source_field_id': expense_field['id'],
-                        'is_enabled': expense_field['is_enabled'] if 'is_enabled' in expense_field else False
-                    }
-                )
+                attribute_type = expense_field['field_name'].replace(' ', '_').upper()
+                staged_expense_fields.pop(attribute_type, None)
+                staged_expense_fields[attribute_type] = {
+                    'attribute_type': attribute_type,
+                    'source_field_id': expense_field['id'],
+                    'is_enabled': expense_field['is_enabled'] if 'is_enabled' in expense_field else False
+                }
+
+        if not staged_expense_fields:
+            return {'expense_fields': [], 'changed_expense_fields': []}
+
+        with connection.cursor() as cursor:
+            cursor.execute(EXPENSE_FIELDS_UPSERT_QUERY, {
+                'workspace_id': workspace_id,
+                'rows': json.dumps(list(staged_expense_fields.values()))
+            })
+            changed_ids = {row[0] for row in cursor.fetchall()}
+
+        expense_fields_map = {
+            expense_field.attribute_type: expense_field
+            for expense_field in ExpenseField.objects.filter(
+                workspace_id=workspace_id, attribute_type__in=staged_expense_fields.keys()
+            )
+        }
+        expense_fields = [expense_fields_map[attribute_type] for attribute_type in staged_expense_fields]
 
-        return expense_fields
+        logger.info(
+            "Upserted %s Expense Fields in Workspace %s - %s created or changed", len(expense_fields), workspace_id, len(changed_ids)
+        )
+
+        return {
+            'expense_fields': expense_fields,
+            'changed_expense_fields': [expense_field for expense_field in expense_fields if expense_field.id in changed_ids]
+        }
 
 
 class MappingSetting(AutoAddCreateUpdateInfoMixin, models.Model):
@@ -818,29 +1600,73 @@ class MappingSetting(AutoAddCreateUpdateInfoMixin, models.Model):
         db_table = 'mapping_settings'
 
     @staticmethod
-    def bulk_upsert_mapping_setting(settings: List[Dict], workspace_id: int):
+    def bulk_upsert_mapping_setting(settings: List[Dict], workspace_id: int, user=None):
         """
         Bulk update or create mapping setting
+        Existing settings are read in one query and written with one bulk_create and one bulk_update
+        :param settings: Mapping settings payload
+        :param workspace_id: Workspace Id
+        :param user: Optional, user whose email is stored in created_by / updated_by
+        :return: Mapping settings in the order of the payload
         """
         validate_mapping_settings(settings)
-        mapping_settings = []
+
+        keys = []
+        defaults_map = {}
+        for setting in settings:
+            key = (
+                setting['source_field'],
+                setting['destination_field'],
+                setting['parent_field'] if 'parent_field' in setting else None
+            )
+            keys.append(key)
+            # A key repeated in the payload is written once with its last values, as consecutive update_or_create calls would
+            defaults_map[key] = {
+                'import_to_fyle': setting['import_to_fyle'] if 'import_to_fyle' in setting else False,
+                'is_custom': setting['is_custom'] if 'is_custom' in setting else False
+            }
 
         with transaction.atomic():
-            for setting in settings:
+            existing_mapping_settings = MappingSetting.objects.filter(
+                workspace_id=workspace_id,
+                source_field__in=[key[0] for key in defaults_map],
+                destination_field__in=[key[1] for key in defaults_map]
+            )
+            mapping_settings_map = {
+                (mapping_setting.source_field, mapping_setting.destination_field, mapping_setting.expense_field_id): mapping_setting
+                for mapping_setting in existing_mapping_settings
+            }
 
-                mapping_setting, _ = MappingSetting.objects.update_or_create(
-                    source_field=setting['source_field'],
-                    workspace_id=workspace_id,
-                    destination_field=setting['destination_field'],
-                    expense_field_id=setting['parent_field'] if 'parent_field' in setting else None,
-                    defaults={
-                        'import_to_fyle': setting['import_to_fyle'] if 'import_to_fyle' in setting else False,
-                        'is_custom': setting['is_custom'] if 'is_custom' in setting else False
-                    }
-                )
-                mapping_settings.append(mapping_setting)
+            mapping_settings_to_be_created = []
+            mapping_settings_to_be_updated = []
+
+            for key, defaults in defaults_map.items():
+                mapping_setting = mapping_settings_map.get(key)
+
+                if mapping_setting:
+                    mapping_setting.import_to_fyle = defaults['import_to_fyle']
+                    mapping_setting.is_custom = defaults['is_custom']
+                    mapping_setting.updated_at = datetime.now(timezone.utc)
+                    mapping_settings_to_be_updated.append(mapping_setting)
+                else:
+                    mapping_setting = MappingSetting(
+                        source_field=key[0],
+                        destination_field=key[1],
+                        expense_field_id=key[2],
+                        workspace_id=workspace_id,
+                        **defaults
+                    )
+                    mapping_settings_map[key] = mapping_setting
+                    mapping_settings_to_be_created.append(mapping_setting)
+
+            if mapping_settings_to_be_created:
+                MappingSetting.objects.bulk_create(mapping_settings_to_be_created, user=user, batch_size=50)
 
-            return mapping_settings
+            if mapping_settings_to_be_updated:
+                MappingSetting.objects.bulk_update(
+                    mapping_settings_to_be_updated, fields=['import_to_fyle', 'is_custom', 'updated_at'], user=user, batch_size=50)
+
+            return [mapping_settings_map[key] for key in keys]
 
 
 class Mapping(models.Model):
@@ -861,6 +1687,7 @@ class Mapping(models.Model):
         db_table = 'mappings'
         indexes = [
             models.Index(fields=['workspace_id', 'source_type', 'destination_type']),
+            models.Index(fields=['source_id', 'destination_type'], name='fyle_accoun_source_mp_idx'),
         ]
 
     @staticmethod
@@ -968,7 +1795,39 @@ class Mapping(models.Model):
                     )
                 )
 
-        return create_mappings_and_update_flag(mapping_batch, set_auto_mapped_flag)
+        mappings = create_mappings_and_update_flag(mapping_batch, set_auto_mapped_flag)
+
+        return mappings
+
+    @staticmethod
+    def bulk_auto_map_attributes(source_type: str, destination_type: str, workspace_id: int,
+                                 destination_attribute_ids: List[int] = None, set_auto_mapped_flag: bool = True) -> int:
+        """
+        Set based alternative to bulk_create_mappings, matching is done in the database
+        Unmapped source attributes are mapped to the destination attribute with the same case-insensitive value
+        :param source_type: Source Type
+        :param destination_type: Destination Type
+        :param workspace_id: workspace_id
+        :param destination_attribute_ids: Optional, restrict matching to these destination attribute ids
+        :param set_auto_mapped_flag: set auto mapped to expense attributes
+        :return: Number of mappings created
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(MAPPINGS_AUTO_MAP_INSERT_QUERY, {
+                    'source_type': source_type,
+                    'destination_type': destination_type,
+                    'workspace_id': workspace_id,
+                    'destination_attribute_ids': list(destination_attribute_ids) if destination_attribute_ids is not None else None
+                })
+                mapped_source_ids = [source_id for source_id, in cursor.fetchall()]
+
+                if set_auto_mapped_flag and mapped_source_ids:
+                    cursor.execute(EXPENSE_ATTRIBUTES_SET_AUTO_MAPPED_QUERY, {'ids': mapped_source_ids})
+
+        logger.info("Auto mapped %s %s to %s in Workspace %s", len(mapped_source_ids), source_type, destination_type, workspace_id)
+
+        return len(mapped_source_ids)
 
     @staticmethod
     def auto_map_employees(destination_type: str, employee_mapping_preference: str, workspace_id: int):
@@ -994,25 +1853,21 @@ class Mapping(models.Model):
             if value_to_be_appended:
                 destination_id_value_map[value_to_be_appended.lower()] = destination_employee.id
 
-        employee_source_attributes_count = ExpenseAttribute.objects.filter(
+        existing_source_ids = get_existing_source_ids(destination_type, workspace_id)
+
+        employee_source_attributes = ExpenseAttribute.objects.filter(
             attribute_type='EMPLOYEE', workspace_id=workspace_id, auto_mapped=False
-        ).count()
-        page_size = 200
-        employee_source_attributes = []
-
-        for offset in range(0, employee_source_attributes_count, page_size):
-            limit = offset + page_size
-            paginated_employee_source_attributes = ExpenseAttribute.objects.filter(
-                attribute_type='EMPLOYEE', workspace_id=workspace_id, auto_mapped=False
-            )[offset:limit]
-            employee_source_attributes.extend(paginated_employee_source_attributes)
-
-        mapping_batch = construct_mapping_payload(
-            employee_source_attributes, employee_mapping_preference,
-            destination_id_value_map, destination_type, workspace_id
-        )
+        ).only('id', 'value', 'detail')
 
-        create_mappings_and_update_flag(mapping_batch)
+        # Each page is matched and written before the next one is fetched
+        for employee_source_attributes_page in iterate_in_keyset_pages(employee_source_attributes, EMPLOYEES_AUTO_MAP_PAGE_SIZE):
+            mapping_batch = construct_mapping_payload(
+                employee_source_attributes_page, employee_mapping_preference,
+                destination_id_value_map, destination_type, workspace_id, existing_source_ids=existing_source_ids
+            )
+
+            if mapping_batch:
+                create_mappings_and_update_flag(mapping_batch)
 
     @staticmethod
     def auto_map_ccc_employees(destination_type: str, default_ccc_account_id: str, workspace_id: int):
@@ -1024,7 +1879,7 @@ class Mapping(models.Model):
         """
         employee_source_attributes = ExpenseAttribute.objects.filter(
             attribute_type='EMPLOYEE', workspace_id=workspace_id
-        ).all()
+        ).only('id')
 
         default_destination_attribute = DestinationAttribute.objects.filter(
             destination_id=default_ccc_account_id, workspace_id=workspace_id, attribute_type=destination_type
@@ -1032,21 +1887,23 @@ class Mapping(models.Model):
 
         existing_source_ids = get_existing_source_ids(destination_type, workspace_id)
 
-        mapping_batch = []
-        for source_employee in employee_source_attributes:
-            # Ignoring already present mappings
-            if source_employee.id not in existing_source_ids:
-                mapping_batch.append(
-                    Mapping(
-                        source_type='EMPLOYEE',
-                        destination_type=destination_type,
-                        source_id=source_employee.id,
-                        destination_id=default_destination_attribute.id,
-                        workspace_id=workspace_id
+        for employee_source_attributes_page in iterate_in_keyset_pages(employee_source_attributes, EMPLOYEES_AUTO_MAP_PAGE_SIZE):
+            mapping_batch = []
+            for source_employee in employee_source_attributes_page:
+                # Ignoring already present mappings
+                if source_employee.id not in existing_source_ids:
+                    mapping_batch.append(
+                        Mapping(
+                            source_type='EMPLOYEE',
+                            destination_type=destination_type,
+                            source_id=source_employee.id,
+                            destination_id=default_destination_attribute.id,
+                            workspace_id=workspace_id
+                        )
                     )
-                )
 
-        Mapping.objects.bulk_create(mapping_batch, batch_size=50)
+            if mapping_batch:
+                Mapping.objects.bulk_create(mapping_batch, batch_size=50)
 
 
 class EmployeeMapping(models.Model):
@@ -1183,7 +2040,9 @@ class CategoryMapping(models.Model):
                     )
                 )
 
-        return create_mappings_and_update_flag(mapping_creation_batch, set_auto_mapped_flag, model_type=CategoryMapping)
+        mappings = create_mappings_and_update_flag(mapping_creation_batch, set_auto_mapped_flag, model_type=CategoryMapping)
+
+        return mappings
 
     @staticmethod
     def bulk_create_ccc_category_mappings(workspace_id: int):
@@ -1324,3 +2183,256 @@ class FyleSyncTimestamp(models.Model):
         fyle_sync_timestamp = FyleSyncTimestamp.objects.get(workspace_id=workspace_id)
         setattr(fyle_sync_timestamp, f'{entity_type}_synced_at', datetime.now()-timedelta(hours=2))
         fyle_sync_timestamp.save(update_fields=[f'{entity_type}_synced_at', 'updated_at'])
+
+
+class WorkspaceDataVersion(models.Model):
+    """
+    Last time the rows of an attribute type changed in a table of a workspace
+    Maintained by database triggers for every write, ORM or raw (see migration 0041), list ETags are validated
+    against it with a lookup instead of scanning the table
+    """
+    id = models.AutoField(primary_key=True)
+    workspace = models.ForeignKey(Workspace, on_delete=models.PROTECT, help_text='Reference to Workspace model')
+    table_name = models.CharField(max_length=255, help_text='Table of the changed rows')
+    attribute_type = models.CharField(max_length=255, help_text='Attribute type / source type of the changed rows')
+    changed_at = models.DateTimeField(help_text='Datetime when the rows were last changed')
+
+    class Meta:
+        db_table = 'workspace_data_versions'
+        unique_together = ('workspace', 'table_name', 'attribute_type')
+
+    @staticmethod
+    def get_versions(workspace_id: int, models_list: Iterable, attribute_types: Iterable[str] = None) -> List[tuple]:
+        """
+        Get the (table_name, attribute_type, changed_at) versions of tables of a workspace
+        :param workspace_id: Workspace Id
+        :param models_list: Models of the tables
+        :param attribute_types: Optional, only get the versions of these attribute types
+        :return: versions, ordered
+        """
+        versions = WorkspaceDataVersion.objects.filter(
+            workspace_id=workspace_id, table_name__in=[model._meta.db_table for model in models_list])
+        if attribute_types is not None:
+            versions = versions.filter(attribute_type__in=set(attribute_types))
+
+        return list(versions.order_by('table_name', 'attribute_type').values_list('table_name', 'attribute_type', 'changed_at'))
+
+
+class MappingStatsCache(models.Model):
+    """
+    Mapped / unmapped counts served by the mapping stats views
+    A row is counted on the first read of a pair, then recounted by the database when a transaction changing
+    a table it is counted from commits (see migration 0041), reads are lookups on the unique key
+    """
+    id = models.AutoField(primary_key=True)
+    workspace = models.ForeignKey(Workspace, on_delete=models.PROTECT, help_text='Reference to Workspace model')
+    source_type = models.CharField(max_length=255, help_text='Fyle Enum')
+    destination_type = models.CharField(max_length=255, help_text='Destination Enum')
+    app_name = models.CharField(max_length=255, default='', help_text='Name of the app the counts are computed for')
+    employee_vendor_purchase_from = models.BooleanField(
+        default=False, help_text='Whether employees are counted as mapped to either a vendor or an employee')
+    all_attributes_count = models.IntegerField(default=0, help_text='Count of active source attributes')
+    unmapped_attributes_count = models.IntegerField(default=0, help_text='Count of active unmapped source attributes')
+    counted_at = models.DateTimeField(null=True, help_text='Datetime when the counts were computed')
+    created_at = models.DateTimeField(auto_now_add=True, help_text='Created at datetime')
+    updated_at = models.DateTimeField(auto_now=True, help_text='Updated at datetime')
+
+    class Meta:
+        db_table = 'mapping_stats_cache'
+        unique_together = ('workspace', 'source_type', 'destination_type', 'app_name', 'employee_vendor_purchase_from')
+
+    @staticmethod
+    def get_stats_options(app_name: str = None, employee_vendor_purchase_from: bool = False) -> Tuple[str, bool]:
+        """
+        Reduce the options passed by clients to the ones the counts depend on, so cached counts are keyed on a fixed set
+        :param app_name: Name of the app, counted as '' when it has no rules of its own
+        :param employee_vendor_purchase_from: Only applies to QuickBooks Desktop Connector
+        :return: app_name, employee_vendor_purchase_from
+        """
+        if app_name not in STATS_APP_NAMES:
+            app_name = ''
+
+        return app_name, bool(employee_vendor_purchase_from) and app_name == 'QuickBooks Desktop Connector'
+
+    @staticmethod
+    def count_stats(workspace_id: int, pairs: List[tuple], app_name: str, employee_vendor_purchase_from: bool):
+        """
+        Add the rows of pairs and count them
+        :param workspace_id: Workspace Id
+        :param pairs: (source_type, destination_type) pairs
+        :param app_name: Name of the app, as returned by get_stats_options
+        :param employee_vendor_purchase_from: As returned by get_stats_options
+        """
+        MappingStatsCache.objects.bulk_create([
+            MappingStatsCache(
+                workspace_id=workspace_id,
+                source_type=source_type,
+                destination_type=destination_type,
+                app_name=app_name,
+                employee_vendor_purchase_from=employee_vendor_purchase_from
+            ) for source_type, destination_type in pairs
+        ], batch_size=50, ignore_conflicts=True)
+
+        MappingStatsCache.refresh_stats(workspace_id, {source_type for source_type, _ in pairs})
+
+    @staticmethod
+    def get_stats(workspace_id: int, pairs: List[tuple], app_name: str = None,
+                  employee_vendor_purchase_from: bool = False) -> List[Dict]:
+        """
+        Get cached stats of (source_type, destination_type) pairs, missing pairs are counted and cached
+        :param workspace_id: Workspace Id
+        :param pairs: (source_type, destination_type) pairs
+        :param app_name: Name of the app
+        :param employee_vendor_purchase_from: Whether employees are mapped to either a vendor or an employee
+        :return: counts per pair
+        """
+        app_name, employee_vendor_purchase_from = MappingStatsCache.get_stats_options(
+            app_name, employee_vendor_purchase_from)
+
+        def get_cached_stats() -> Dict[tuple, Dict]:
+            return {
+                (cached_stat['source_type'], cached_stat['destination_type']): cached_stat
+                for cached_stat in MappingStatsCache.objects.filter(
+                    workspace_id=workspace_id,
+                    app_name=app_name,
+                    employee_vendor_purchase_from=employee_vendor_purchase_from,
+                    source_type__in={source_type for source_type, _ in pairs},
+                    destination_type__in={destination_type for _, destination_type in pairs},
+                    counted_at__isnull=False
+                ).values('source_type', 'destination_type', 'all_attributes_count', 'unmapped_attributes_count')
+            }
+
+        cached_stats = get_cached_stats()
+        missing_pairs = [pair for pair in dict.fromkeys(pairs) if pair not in cached_stats]
+
+        if missing_pairs:
+            MappingStatsCache.count_stats(workspace_id, missing_pairs, app_name, employee_vendor_purchase_from)
+            cached_stats = get_cached_stats()
+
+        return [cached_stats[pair] for pair in pairs]
+
+    @staticmethod
+    def refresh_stats(workspace_id: int, source_types: Iterable[str] = None):
+        """
+        Recount the cached stats of a workspace, in one grouped query
+        :param workspace_id: Workspace Id
+        :param source_types: Optional, only recount the stats of these source types
+        """
+        if source_types is None:
+            source_types = MappingStatsCache.objects.filter(workspace_id=workspace_id).values_list('source_type', flat=True)
+
+        with connection.cursor() as cursor:
+            cursor.execute(MAPPING_STATS_CACHE_REFRESH_QUERY, {
+                'workspace_id': workspace_id,
+                'source_types': sorted(set(source_types))
+            })
+
+
+class DestinationAttributesStatsCache(models.Model):
+    """
+    Total / active counts served by the destination attributes stats view
+    A row is counted on the first read of an attribute type, then recounted by the database when a transaction
+    changing attributes of the type commits (see migration 0041), reads are lookups on the unique key
+    """
+    id = models.AutoField(primary_key=True)
+    workspace = models.ForeignKey(Workspace, on_delete=models.PROTECT, help_text='Reference to Workspace model')
+    attribute_type = models.CharField(max_length=255, help_text='Type of destination attribute')
+    display_name = models.CharField(max_length=255, default='', help_text='Display name of attribute, empty for all')
+    attributes_count = models.IntegerField(default=0, help_text='Count of attributes')
+    active_attributes_count = models.IntegerField(default=0, help_text='Count of active attributes')
+    counted_at = models.DateTimeField(null=True, help_text='Datetime when the counts were computed')
+    created_at = models.DateTimeField(auto_now_add=True, help_text='Created at datetime')
+    updated_at = models.DateTimeField(auto_now=True, help_text='Updated at datetime')
+
+    class Meta:
+        db_table = 'destination_attributes_stats_cache'
+        unique_together = ('workspace', 'attribute_type', 'display_name')
+
+    @staticmethod
+    def count_attributes(workspace_id: int, attribute_type: str) -> Dict[str, Dict]:
+        """
+        Count the attributes of a type per display_name, '' holds the counts of all display names
+        :param workspace_id: Workspace Id
+        :param attribute_type: Attribute type
+        :return: display_name -> counts
+        """
+        counts = {'': {'attributes_count': 0, 'active_attributes_count': 0}}
+
+        for row in DestinationAttribute.objects.filter(
+            workspace_id=workspace_id, attribute_type=attribute_type
+        ).values('display_name').annotate(
+            attributes_count=Count('id'), active_attributes_count=Count('id', filter=Q(active=True))
+        ).order_by():
+            counts[row['display_name']] = {
+                'attributes_count': row['attributes_count'],
+                'active_attributes_count': row['active_attributes_count']
+            }
+            counts['']['attributes_count'] += row['attributes_count']
+            counts['']['active_attributes_count'] += row['active_attributes_count']
+
+        return counts
+
+    @staticmethod
+    def count_stats(workspace_id: int, attribute_type: str, display_names: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Count the attributes of a type and store the counts of display names, in one grouped query
+        Display names without attributes are not stored, so requests for arbitrary names do not add rows
+        :param workspace_id: Workspace Id
+        :param attribute_type: Attribute type
+        :param display_names: Display names to be stored, '' for all
+        :return: display_name -> counts
+        """
+        counted_at = datetime.now(timezone.utc)
+        counts = DestinationAttributesStatsCache.count_attributes(workspace_id, attribute_type)
+
+        DestinationAttributesStatsCache.objects.bulk_create([
+            DestinationAttributesStatsCache(
+                workspace_id=workspace_id,
+                attribute_type=attribute_type,
+                display_name=display_name,
+                counted_at=counted_at,
+                **counts[display_name]
+            ) for display_name in set(display_names) if display_name in counts
+        ], update_conflicts=True, unique_fields=['workspace', 'attribute_type', 'display_name'],
+            update_fields=['attributes_count', 'active_attributes_count', 'counted_at', 'updated_at'])
+
+        return counts
+
+    @staticmethod
+    def get_stats(workspace_id: int, attribute_type: str, display_name: str = None) -> Dict:
+        """
+        Get cached stats of an attribute type, counted and cached when missing
+        :param workspace_id: Workspace Id
+        :param attribute_type: Attribute type
+        :param display_name: Optional, display name of the attributes
+        :return: counts
+        """
+        display_name = display_name or ''
+
+        cached_stat = DestinationAttributesStatsCache.objects.filter(
+            workspace_id=workspace_id, attribute_type=attribute_type, display_name=display_name
+        ).values('attributes_count', 'active_attributes_count').first()
+
+        if cached_stat:
+            return cached_stat
+
+        counts = DestinationAttributesStatsCache.count_stats(workspace_id, attribute_type, [display_name])
+
+        return counts.get(display_name, {'attributes_count': 0, 'active_attributes_count': 0})
+
+    @staticmethod
+    def refresh_stats(workspace_id: int, attribute_types: Iterable[str] = None):
+        """
+        Recount the cached stats of a workspace, one grouped query per attribute type
+        :param workspace_id: Workspace Id
+        :param attribute_types: Optional, only recount the stats of these attribute types
+        """
+        if attribute_types is None:
+            attribute_types = DestinationAttributesStatsCache.objects.filter(
+                workspace_id=workspace_id).values_list('attribute_type', flat=True)
+
+        with connection.cursor() as cursor:
+            cursor.execute(DESTINATION_ATTRIBUTES_STATS_CACHE_REFRESH_QUERY, {
+                'workspace_id': workspace_id,
+                'attribute_types': sorted(set(attribute_types))
+            })
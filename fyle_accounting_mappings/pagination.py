@@ -0,0 +1,111 @@
+"""
+Mapping Paginations
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ValueKeysetPagination(LimitOffsetPagination):
+    """
+    Keyset pagination on (value, id), every page is fetched with an index range scan
+    starting after the last row of the previous page instead of an OFFSET
+    The cursor is opaque to clients, the total count is only computed with ?count=true
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_cursor_limit = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Set by paginate_queryset for the page being rendered
+    request = None
+    limit = None
+    count = None
+    next_position = None
+
+    def encode_cursor(self, position: tuple) -> str:
+        return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor: str):
+        """
+        Decode the (value, id) position of a cursor, an empty cursor is the first page
+        """
+        if not cursor:
+            return None
+
+        try:
+            value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            return str(value), int(row_id)
+        except (binascii.Error, TypeError, ValueError, UnicodeError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    @staticmethod
+    def get_position(row) -> tuple:
+        if isinstance(row, dict):
+            return row['value'], row['id']
+        return row.value, row.id
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request) or self.default_cursor_limit
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() == 'true':
+            self.count = queryset.count()
+
+        queryset = queryset.order_by('value', 'id')
+        if position:
+            value, row_id = position
+            # value >= gives the planner an index range to start from, the OR only breaks ties on id
+            queryset = queryset.filter(Q(value__gte=value) & (Q(value__gt=value) | Q(id__gt=row_id)))
+
+        rows = list(queryset[:self.limit + 1])
+
+        self.next_position = self.get_position(rows[self.limit - 1]) if len(rows) > self.limit else None
+
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def get_previous_link(self):
+        return None
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data)
+        ]))
+
+
+class KeysetPaginationMixin:
+    """
+    Switch a list view ordered by value to ValueKeysetPagination when ?cursor= is passed,
+    requests without it keep the default pagination
+    """
+    keyset_pagination_class = ValueKeysetPagination
+
+    @property
+    def paginator(self):
+        if self.keyset_pagination_class is None or self.keyset_pagination_class.cursor_query_param not in self.request.query_params:
+            return super().paginator
+
+        if not isinstance(getattr(self, '_paginator', None), self.keyset_pagination_class):
+            self._paginator = self.keyset_pagination_class()
+
+        return self._paginator
@@ -0,0 +1,203 @@
+"""
+Raw SQL used by set-based bulk operations
+"""
+
+EXPENSE_ATTRIBUTES_UPSERT_QUERY = """
+    with upserted as (
+        insert into expense_attributes (
+            attribute_type, display_name, value, source_id, workspace_id,
+            auto_mapped, auto_created, active, detail, created_at, updated_at
+        )
+        select
+            staged.attribute_type, staged.display_name, staged.value, staged.source_id, staged.workspace_id,
+            false, false, staged.active, staged.detail, now(), now()
+        from jsonb_to_recordset(%(rows)s::jsonb) as staged(
+            attribute_type text, display_name text, value text, source_id text,
+            workspace_id integer, active boolean, detail jsonb
+        )
+        on conflict (value, attribute_type, workspace_id) do {conflict_action}
+        returning workspace_id, attribute_type, (xmax = 0) as created
+    )
+    select
+        workspace_id,
+        attribute_type,
+        count(*) filter (where created) as created_count,
+        count(*) filter (where not created) as updated_count
+    from upserted
+    group by workspace_id, attribute_type
+"""
+
+EXPENSE_ATTRIBUTES_UPSERT_UPDATE_ACTION = """
+    update set
+        source_id = excluded.source_id,
+        detail = excluded.detail,
+        active = excluded.active,
+        updated_at = excluded.updated_at
+    where (expense_attributes.source_id, expense_attributes.detail, expense_attributes.active)
+        is distinct from (excluded.source_id, excluded.detail, excluded.active)
+"""
+
+EXPENSE_ATTRIBUTES_UPSERT_SKIP_ACTION = 'nothing'
+
+EXPENSE_ATTRIBUTES_DISABLE_DELETED_QUERY = """
+    update expense_attributes as ea
+    set active = false, updated_at = now()
+    where ea.workspace_id = %(workspace_id)s
+        and ea.attribute_type = %(attribute_type)s
+        and ea.active = true
+        and not exists (
+            select 1
+            from expense_attributes_deletion_cache as cache, unnest(cache.{cache_field}) as seen(identifier)
+            where cache.workspace_id = %(workspace_id)s
+                and seen.identifier = ea.{attribute_field}
+        )
+"""
+
+# An attribute of a custom field is disabled when it is missing from any of the value lists cached for its type
+EXPENSE_ATTRIBUTES_DISABLE_DELETED_CUSTOM_FIELDS_QUERY = """
+    with entries as (
+        select entry.idx, entry.item->>'attribute_type' as attribute_type, entry.item->'value_list' as value_list
+        from expense_attributes_deletion_cache as cache,
+            jsonb_array_elements(cache.custom_field_list) with ordinality as entry(item, idx)
+        where cache.workspace_id = %(workspace_id)s
+    ), entry_counts as (
+        select attribute_type, count(*) as entry_count
+        from entries
+        group by attribute_type
+    ), seen_values as (
+        select entries.attribute_type, seen.value, count(distinct entries.idx) as seen_count
+        from entries, jsonb_array_elements_text(entries.value_list) as seen(value)
+        group by entries.attribute_type, seen.value
+    ), disabled as (
+        update expense_attributes as ea
+        set active = false, updated_at = now()
+        from (
+            select candidate.id
+            from expense_attributes as candidate
+            join entry_counts on entry_counts.attribute_type = candidate.attribute_type
+            left join seen_values
+                on seen_values.attribute_type = candidate.attribute_type and seen_values.value = candidate.value
+            where candidate.workspace_id = %(workspace_id)s
+                and candidate.active = true
+                and coalesce(seen_values.seen_count, 0) < entry_counts.entry_count
+        ) as deleted
+        where ea.id = deleted.id
+        returning ea.attribute_type
+    )
+    select attribute_type, count(*)
+    from disabled
+    group by attribute_type
+"""
+
+EXPENSE_ATTRIBUTES_DELETION_STAGING_INSERT_QUERY = """
+    insert into expense_attributes_deletion_staging (workspace_id, attribute_type, sync_run_id, identifier, created_at)
+    select %(workspace_id)s, %(attribute_type)s, %(sync_run_id)s, staged.identifier, now()
+    from unnest(%(identifiers)s::text[]) as staged(identifier)
+    on conflict do nothing
+"""
+
+EXPENSE_ATTRIBUTES_DISABLE_UNSTAGED_QUERY = """
+    update expense_attributes as ea
+    set active = false, updated_at = now()
+    where ea.workspace_id = %(workspace_id)s
+        and ea.attribute_type = %(attribute_type)s
+        and ea.active = true
+        and not exists (
+            select 1
+            from expense_attributes_deletion_staging as staging
+            where staging.workspace_id = %(workspace_id)s
+                and staging.attribute_type = %(attribute_type)s
+                and staging.sync_run_id = %(sync_run_id)s
+                and staging.identifier = ea.{attribute_field}
+        )
+"""
+
+EXPENSE_ATTRIBUTES_DISABLE_UNSTAGED_CUSTOM_FIELDS_QUERY = """
+    with disabled as (
+        update expense_attributes as ea
+        set active = false, updated_at = now()
+        where ea.workspace_id = %(workspace_id)s
+            and ea.active = true
+            and ea.attribute_type = any(%(attribute_types)s)
+            and not exists (
+                select 1
+                from expense_attributes_deletion_staging as staging
+                where staging.workspace_id = %(workspace_id)s
+                    and staging.attribute_type = ea.attribute_type
+                    and staging.sync_run_id = %(sync_run_id)s
+                    and staging.identifier = ea.value
+            )
+        returning ea.attribute_type
+    )
+    select attribute_type, count(*)
+    from disabled
+    group by attribute_type
+"""
+
+# Rows without the token of the current sync run were not returned by the destination and are disabled
+# Their fingerprint is cleared by the destination_attributes_clear_fingerprint trigger
+DESTINATION_ATTRIBUTES_DISABLE_UNSYNCED_QUERY = """
+    update destination_attributes
+    set active = false, updated_at = now()
+    where workspace_id = %(workspace_id)s
+        and attribute_type = %(attribute_type)s
+        and (%(display_name)s::text is null or display_name = %(display_name)s)
+        and active is not false
+        and sync_run_id is distinct from %(sync_run_id)s
+    returning destination_id, value, code
+"""
+
+# Unmapped source attributes are matched to destination attributes on case-insensitive value, one mapping per source
+MAPPINGS_AUTO_MAP_INSERT_QUERY = """
+    insert into mappings (source_type, destination_type, source_id, destination_id, workspace_id, created_at, updated_at)
+    select distinct on (ea.id)
+        %(source_type)s, %(destination_type)s, ea.id, da.id, %(workspace_id)s, now(), now()
+    from expense_attributes as ea
+    join destination_attributes as da
+        on lower(da.value) = lower(ea.value)
+        and da.workspace_id = %(workspace_id)s
+        and da.attribute_type = %(destination_type)s
+        and (%(destination_attribute_ids)s::integer[] is null or da.id = any(%(destination_attribute_ids)s::integer[]))
+    where ea.workspace_id = %(workspace_id)s
+        and ea.attribute_type = %(source_type)s
+        and not exists (
+            select 1
+            from mappings
+            where mappings.source_id = ea.id
+        )
+    order by ea.id, da.id
+    on conflict do nothing
+    returning source_id
+"""
+
+# updated_at is left untouched, it is the watermark of incremental syncs from Fyle (see get_last_synced_at)
+EXPENSE_ATTRIBUTES_SET_AUTO_MAPPED_QUERY = """
+    update expense_attributes
+    set auto_mapped = true
+    where id = any(%(ids)s::integer[])
+        and auto_mapped = false
+"""
+
+# Only rows created or whose source_field_id / is_enabled changed are written and returned
+EXPENSE_FIELDS_UPSERT_QUERY = """
+    insert into expense_fields (attribute_type, source_field_id, workspace_id, is_enabled, created_at, updated_at)
+    select staged.attribute_type, staged.source_field_id, %(workspace_id)s, staged.is_enabled, now(), now()
+    from jsonb_to_recordset(%(rows)s::jsonb) as staged(attribute_type text, source_field_id integer, is_enabled boolean)
+    on conflict (attribute_type, workspace_id) do update set
+        source_field_id = excluded.source_field_id,
+        is_enabled = excluded.is_enabled,
+        updated_at = excluded.updated_at
+    where (expense_fields.source_field_id, expense_fields.is_enabled)
+        is distinct from (excluded.source_field_id, excluded.is_enabled)
+    returning id
+"""
+
+# The counting rules of the stats live in the functions, see migration 0041
+MAPPING_STATS_CACHE_REFRESH_QUERY = """
+    select refresh_mapping_stats_cache(%(workspace_id)s, %(source_types)s::text[])
+"""
+
+DESTINATION_ATTRIBUTES_STATS_CACHE_REFRESH_QUERY = """
+    select refresh_destination_attributes_stats_cache(%(workspace_id)s, refreshed.attribute_type)
+    from unnest(%(attribute_types)s::text[]) as refreshed(attribute_type)
+"""
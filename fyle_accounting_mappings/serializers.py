@@ -1,12 +1,96 @@
 """
 Mapping Serializers
 """
+from typing import Dict, Iterable, List
+
 from rest_framework import serializers
+from django.db import models
 from django.db.models.query import Q
 from .models import ExpenseAttribute, DestinationAttribute, Mapping, MappingSetting, EmployeeMapping, \
     CategoryMapping, ExpenseField
 
 
+class RowSerializer:
+    """
+    Read only serializer building rows from .values() dicts with a field plan compiled once per ModelSerializer
+    Output is identical to the ModelSerializer, without model instances or per row field binding
+    """
+    passthrough_field_types = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField)
+    field_plans = {}
+
+    def __init__(self, serializer_class, instance: Iterable[Dict] = None):
+        self.field_plan = self.get_field_plan(serializer_class)
+        self.instance = instance
+
+    @classmethod
+    def get_field_plan(cls, serializer_class) -> List[tuple]:
+        if serializer_class not in cls.field_plans:
+            cls.field_plans[serializer_class] = cls.compile_field_plan(serializer_class)
+
+        return cls.field_plans[serializer_class]
+
+    @classmethod
+    def compile_field_plan(cls, serializer_class) -> List[tuple]:
+        """
+        Compile the readable fields of a ModelSerializer
+        :param serializer_class: ModelSerializer class with flat fields and primary key relations only
+        :return: (field name, values() column, converter) per field, converter is None when values are passed as is
+        """
+        model = serializer_class.Meta.model
+        field_plan = []
+
+        for field_name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField, serializers.ManyRelatedField)) \
+                    or '.' in field.source or field.source == '*':
+                raise ValueError(f'Field {field_name} of {serializer_class.__name__} cannot be built from a values() row')
+
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                field_plan.append((field_name, model._meta.get_field(field.source).attname, None))
+            elif isinstance(field, serializers.RelatedField):
+                raise ValueError(f'Field {field_name} of {serializer_class.__name__} cannot be built from a values() row')
+            elif isinstance(field, cls.passthrough_field_types) or (isinstance(field, serializers.JSONField) and not field.binary):
+                field_plan.append((field_name, field.source, None))
+            else:
+                field_plan.append((field_name, field.source, field.to_representation))
+
+        return field_plan
+
+    @property
+    def columns(self) -> List[str]:
+        return [column for _, column, _ in self.field_plan]
+
+    def to_representation(self, row: Dict) -> Dict:
+        representation = {}
+
+        for field_name, column, converter in self.field_plan:
+            value = row[column]
+            representation[field_name] = converter(value) if converter is not None and value is not None else value
+
+        return representation
+
+    @property
+    def data(self) -> List[Dict]:
+        return [self.to_representation(row) for row in self.instance]
+
+
+class RowSerializerMixin:
+    """
+    List views read .values() rows and serialize them with RowSerializer, other actions keep the serializer_class
+    """
+
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(queryset).values(*RowSerializer(self.get_serializer_class()).columns)
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and 'data' not in kwargs:
+            return RowSerializer(self.get_serializer_class(), *args)
+
+        return super().get_serializer(*args, **kwargs)
+
+
 class ExpenseAttributeSerializer(serializers.ModelSerializer):
     """
     Expense Attribute serializer
@@ -30,7 +114,7 @@ class DestinationAttributeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DestinationAttribute
-        fields = '__all__'
+        exclude = ('fingerprint', 'sync_run_id')
         read_only_fields = (
             'value', 'attribute_type', 'destination_id', 'workspace', 'detail',
             'auto_created', 'active', 'display_name'
@@ -227,7 +311,9 @@ class MappingFilteredListSerializer(serializers.ListSerializer):
     def to_representation(self, data):
         destination_type_list = self.context.get('destination_type_list', [])
         if destination_type_list:
-            data = data.filter(destination_type__in=destination_type_list)
+            # Filtered in memory so that mappings prefetched by the view are not queried again
+            mappings = data.all() if isinstance(data, models.Manager) else data
+            data = [mapping for mapping in mappings if mapping.destination_type in destination_type_list]
 
         return super().to_representation(data)
 
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .e2e_fixtures import BaseFixtureFactory
+from .models import Workspace
+from .views import CategoryAttributesMappingView, EmployeeAttributesMappingView
+
+
+class AttributesMappingViewQueriesTest(TestCase):
+    """
+    Nested mappings of a page are prefetched, the number of queries does not grow with the page size
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.workspace = Workspace.objects.create(name='Attributes Mapping Views')
+
+        fixture_factory = BaseFixtureFactory()
+        expense_attributes = fixture_factory.create_expense_attributes(cls.workspace)
+        destination_attributes = fixture_factory.create_destination_attributes(cls.workspace)
+        fixture_factory.create_employee_mappings(cls.workspace, expense_attributes, destination_attributes, count=6)
+        fixture_factory.create_category_mappings(cls.workspace, expense_attributes, destination_attributes, count=6)
+
+    def get_results(self, view, params: dict, expected_queries: int) -> list:
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=get_user_model()())
+
+        with self.assertNumQueries(expected_queries):
+            response = view.as_view()(request, workspace_id=self.workspace.id)
+            response.render()
+
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_employee_attributes_mapping_view(self):
+        for mapped, mapped_count in (('true', 6), ('false', 5)):
+            for limit in (2, 10):
+                results = self.get_results(
+                    EmployeeAttributesMappingView,
+                    {'destination_type': 'VENDOR', 'mapped': mapped, 'limit': limit},
+                    expected_queries=3
+                )
+
+                self.assertEqual(len(results), min(limit, mapped_count))
+                for result in results:
+                    self.assertEqual(bool(result['employeemapping']), mapped == 'true')
+
+    def test_category_attributes_mapping_view(self):
+        for mapped, mapped_count in (('true', 6), ('false', 5)):
+            for limit in (2, 10):
+                results = self.get_results(
+                    CategoryAttributesMappingView,
+                    {'destination_type': 'ACCOUNT', 'mapped': mapped, 'limit': limit},
+                    # The 'Activity' category and its mapping are looked up once per request
+                    expected_queries=5
+                )
+
+                self.assertEqual(len(results), min(limit, mapped_count))
+                for result in results:
+                    self.assertEqual(bool(result['categorymapping']), mapped == 'true')
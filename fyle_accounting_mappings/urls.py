@@ -23,6 +23,7 @@ from .views import (
     CategoryMappingsView,
     SearchDestinationAttributesView,
     MappingStatsView,
+    MappingStatsBatchView,
     ExpenseAttributesMappingView,
     EmployeeAttributesMappingView,
     ExpenseFieldView,
@@ -39,6 +40,7 @@ urlpatterns = [
     path('category/', CategoryMappingsView.as_view()),
     path('destination_attributes/search/', SearchDestinationAttributesView.as_view()),
     path('stats/', MappingStatsView.as_view()),
+    path('stats/batch/', MappingStatsBatchView.as_view()),
     path('', MappingsView.as_view()),
     path('expense_attributes/', ExpenseAttributesMappingView.as_view()),
     path('category_attributes/', CategoryAttributesMappingView.as_view()),
@@ -1,7 +1,17 @@
-from rest_framework.views import Response
+import hashlib
+import json
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List
+
+from django.apps import apps
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.views import Response, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.serializers import ValidationError
 from rest_framework.filters import BaseFilterBackend
-from django.db.models import Q
 
 
 def assert_valid(condition: bool, message: str) -> Response or None:
@@ -17,6 +27,73 @@ def assert_valid(condition: bool, message: str) -> Response or None:
         })
 
 
+def get_etag(validators: list) -> str:
+    """
+    Build a quoted ETag from JSON serializable validators
+    :param validators: Values identifying a version of a response
+    :return: ETag
+    """
+    return quote_etag(hashlib.md5(json.dumps(validators, sort_keys=True, default=str).encode('utf-8')).hexdigest())
+
+
+def get_conditional_data_response(request, data) -> Response:
+    """
+    Respond with data and the ETag of its content, or 304 Not Modified when If-None-Match matches
+    Meant for small responses computed cheaply, eg. stats read from a cache table
+    :param request: Request
+    :param data: Response data
+    :return: Response
+    """
+    etag = get_etag([data])
+    not_modified_response = get_conditional_response(request, etag=etag)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    response = Response(data=data, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+
+    return response
+
+
+def iterate_in_batches(iterable: Iterable, batch_size: int) -> Iterator[list]:
+    """
+    Consume any iterable / generator lazily in lists of at most batch_size items
+    :param iterable: Iterable to be consumed
+    :param batch_size: Max number of items per batch
+    :return: Iterator of batches
+    """
+    iterator = iter(iterable)
+    batch = list(islice(iterator, batch_size))
+
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
+def iterate_in_keyset_pages(queryset: QuerySet, page_size: int, get_row_id: Callable = None) -> Iterator[list]:
+    """
+    Consume a queryset in pages ordered by id, each page is fetched with id > last seen id instead of an OFFSET
+    Rows updated while iterating (e.g. a flag used in the queryset filter) do not shift the following pages
+    :param queryset: Queryset to be consumed
+    :param page_size: Max number of rows per page
+    :param get_row_id: Optional, returns the id of a row for values / values_list querysets, defaults to row.id
+    :return: Iterator of pages
+    """
+    last_id = None
+
+    while True:
+        page_queryset = queryset.order_by('id')
+        if last_id is not None:
+            page_queryset = page_queryset.filter(id__gt=last_id)
+
+        page = list(page_queryset[:page_size])
+        if not page:
+            return
+
+        yield page
+        last_id = get_row_id(page[-1]) if get_row_id else page[-1].id
+
+
 class LookupFieldMixin:
     lookup_field = 'workspace_id'
 
@@ -42,3 +119,68 @@ class JSONFieldFilterBackend(BaseFilterBackend):
                 filters &= Q(**{param: value if '__in' not in param else value.split(',')})
 
         return queryset.filter(filters)
+
+
+class ConditionalListMixin:
+    """
+    Answer list requests with 304 Not Modified when If-None-Match matches the ETag of the request
+    The ETag is built from the WorkspaceDataVersion rows of the tables the response is read from, so validating a
+    request is a lookup on a few rows whatever the size of the list and the page requested.
+    The rows are bumped by database triggers when any write to the tables commits, the ETag changes with the data.
+    """
+    etag_models = []
+
+    def get_etag_validators(self) -> List[tuple]:
+        """
+        Versions of the tables the response is read from, including nested rows eg. mappings
+        """
+        # Looked up from the app registry, models imports this module
+        workspace_data_version_model = apps.get_model('fyle_accounting_mappings', 'WorkspaceDataVersion')
+
+        return workspace_data_version_model.get_versions(self.kwargs['workspace_id'], self.etag_models)
+
+    def get_list_etag(self) -> str:
+        return get_etag([self.request.get_full_path(), self.get_etag_validators()])
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag()
+
+        not_modified_response = get_conditional_response(request, etag=etag)
+        if not_modified_response is not None:
+            return not_modified_response
+
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+
+        return response
+
+
+class StreamingListMixin:
+    """
+    Stream the list as a JSON array when ?stream=true is passed
+    Rows are read through a server side cursor and rendered one chunk at a time, so memory stays flat
+    and the first bytes are sent before the whole queryset is read
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 2000
+
+    def is_streaming(self) -> bool:
+        return self.request.query_params.get(self.stream_query_param, 'false').lower() == 'true'
+
+    def iterate_rendered_chunks(self, queryset: QuerySet) -> Iterator[bytes]:
+        renderer = JSONRenderer()
+        separator = b''
+
+        yield b'['
+        for rows in iterate_in_batches(queryset.iterator(chunk_size=self.stream_chunk_size), self.stream_chunk_size):
+            # Rendering a chunk as a list and dropping the brackets keeps the bytes identical to the unstreamed response
+            yield separator + renderer.render(self.get_serializer(rows, many=True).data)[1:-1]
+            separator = b','
+        yield b']'
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_streaming():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(self.iterate_rendered_chunks(queryset), content_type='application/json')
@@ -5,24 +5,27 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListCreateAPIView, ListAPIView, DestroyAPIView
 from rest_framework.response import Response
 from rest_framework.views import status
-from django.db.models import Count, Q
+from django.db.models import Count, Max, Q, Prefetch, Exists, OuterRef, Case, When, Value, BooleanField
+from django.contrib.postgres.search import TrigramSimilarity
 
-from .utils import LookupFieldMixin, JSONFieldFilterBackend
+from .utils import LookupFieldMixin, JSONFieldFilterBackend, StreamingListMixin, ConditionalListMixin, \
+    get_conditional_data_response
 from .exceptions import BulkError
 from .utils import assert_valid
 from .models import MappingSetting, Mapping, ExpenseAttribute, DestinationAttribute, EmployeeMapping, \
-    CategoryMapping, ExpenseField
+    CategoryMapping, ExpenseField, MappingStatsCache, DestinationAttributesStatsCache, WorkspaceDataVersion
 from .serializers import ExpenseAttributeMappingSerializer, MappingSettingSerializer, MappingSerializer, \
     EmployeeMappingSerializer, CategoryMappingSerializer, DestinationAttributeSerializer, \
     EmployeeAttributeMappingSerializer, ExpenseFieldSerializer, CategoryAttributeMappingSerializer, \
-    FyleFieldsSerializer
+    FyleFieldsSerializer, RowSerializerMixin
 
-from .helpers import ExpenseAttributeFilter, DestinationAttributeFilter
+from .helpers import ExpenseAttributeFilter, DestinationAttributeFilter, MappingStatsHelper
+from .pagination import KeysetPaginationMixin
 
 logger = logging.getLogger(__name__)
 
 
-class MappingSettingsView(ListCreateAPIView, DestroyAPIView):
+class MappingSettingsView(ConditionalListMixin, ListCreateAPIView, DestroyAPIView):
     """
     Mapping Settings VIew
     """
@@ -31,6 +34,11 @@ class MappingSettingsView(ListCreateAPIView, DestroyAPIView):
     def get_queryset(self):
         return MappingSetting.objects.filter(workspace_id=self.kwargs['workspace_id']).order_by('updated_at')
 
+    def get_etag_validators(self):
+        # Apps write mapping settings directly, the handful of rows of a workspace are validated themselves
+        validators = self.get_queryset().order_by().aggregate(last_updated_at=Max('updated_at'), count=Count('*'))
+        return [validators['last_updated_at'], validators['count']]
+
     def post(self, request, *args, **kwargs):
         """
         Post mapping settings
@@ -40,7 +48,9 @@ class MappingSettingsView(ListCreateAPIView, DestroyAPIView):
 
             assert_valid(mapping_settings != [], 'Mapping settings not found')
 
-            mapping_settings = MappingSetting.bulk_upsert_mapping_setting(mapping_settings, self.kwargs['workspace_id'])
+            mapping_settings = MappingSetting.bulk_upsert_mapping_setting(
+                mapping_settings, self.kwargs['workspace_id'], user=request.user
+            )
 
             return Response(data=self.serializer_class(mapping_settings, many=True).data, status=status.HTTP_200_OK)
         except BulkError as exception:
@@ -163,11 +173,32 @@ class CategoryMappingsView(ListCreateAPIView):
         ).all().order_by('source_category__value')
 
 
-class SearchDestinationAttributesView(ListCreateAPIView):
+class SearchDestinationAttributesView(RowSerializerMixin, ListCreateAPIView):
     """
     Search Destination Attributes View
+    With ?ranked=true the best `limit` matches are returned unpaginated, prefix matches first then by similarity
     """
     serializer_class = DestinationAttributeSerializer
+    ranked_search_default_limit = 20
+    ranked_search_max_limit = 100
+
+    def is_ranked_search(self) -> bool:
+        return self.request.query_params.get('ranked', 'false').lower() == 'true'
+
+    def get_ranked_search_limit(self) -> int:
+        try:
+            limit = int(self.request.query_params.get('limit', self.ranked_search_default_limit))
+        except ValueError:
+            limit = self.ranked_search_default_limit
+
+        return min(max(limit, 1), self.ranked_search_max_limit)
+
+    def paginate_queryset(self, queryset):
+        # Ranked results are already limited, counting every match would cost more than the search itself
+        if self.is_ranked_search():
+            return None
+
+        return super().paginate_queryset(queryset)
 
     def get_queryset(self):
         destination_attribute_type = self.request.query_params.get('destination_attribute_type')
@@ -181,8 +212,28 @@ class SearchDestinationAttributesView(ListCreateAPIView):
             attribute_type=destination_attribute_type,
             workspace_id=self.kwargs['workspace_id']
         ).all()
+
+        if self.is_ranked_search():
+            destination_attributes = destination_attributes.annotate(
+                is_prefix_match=Case(
+                    When(value__istartswith=destination_attribute_value, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField()
+                ),
+                similarity=TrigramSimilarity('value', destination_attribute_value)
+            ).order_by('-is_prefix_match', '-similarity', 'value', 'id')
+
         return destination_attributes
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        # Sliced last, a sliced queryset can no longer be filtered
+        if self.is_ranked_search():
+            return queryset[:self.get_ranked_search_limit()]
+
+        return queryset
+
 
 class MappingStatsView(ListCreateAPIView):
     """
@@ -197,107 +248,89 @@ class MappingStatsView(ListCreateAPIView):
         assert_valid(source_type is not None, 'query param source_type not found')
         assert_valid(destination_type is not None, 'query param destination_type not found')
 
-        filters = {
-            'attribute_type': source_type,
-            'workspace_id': self.kwargs['workspace_id'],
-            'active': True
-        }
+        stats = MappingStatsCache.get_stats(
+            workspace_id=self.kwargs['workspace_id'],
+            pairs=[(source_type, destination_type)],
+            app_name=app_name,
+            employee_vendor_purchase_from=employee_vendor_purchase_from == 'true'
+        )[0]
 
-        total_attributes_count = ExpenseAttribute.objects.filter(**filters).count()
-
-        if source_type == 'EMPLOYEE':
-            if app_name == 'XERO':
-                mapped_attributes_count = Mapping.objects.filter(
-                    workspace_id=self.kwargs['workspace_id'], source_type='EMPLOYEE', source__active=True
-                ).count()
-            elif app_name == 'QuickBooks Desktop Connector' and employee_vendor_purchase_from == 'true':
-                mapped_attributes_count = EmployeeMapping.objects.filter(
-                    workspace_id=self.kwargs['workspace_id'],
-                    source_employee__active=True
-                ).filter(
-                    Q(destination_vendor__isnull=False) | Q(destination_employee__isnull=False)
-                ).count()
-            else:
-                filters = {'source_employee__active': True}
-                if destination_type == 'VENDOR':
-                    filters['destination_vendor__attribute_type'] = destination_type
-                else:
-                    filters['destination_employee__attribute_type'] = destination_type
-
-                mapped_attributes_count = EmployeeMapping.objects.filter(
-                    **filters, workspace_id=self.kwargs['workspace_id']
-                ).count()
-        elif source_type == 'CATEGORY' and app_name in ['Sage Intacct', 'Sage 300 CRE', 'Dynamics 365 Business Central', 'NetSuite']:
-            filters = {}
-
-            if destination_type == 'ACCOUNT':
-                filters['destination_account__attribute_type'] = destination_type
-            else:
-                filters['destination_expense_head__attribute_type'] = destination_type
+        return get_conditional_data_response(request, data={
+            'all_attributes_count': stats['all_attributes_count'],
+            'unmapped_attributes_count': stats['unmapped_attributes_count']
+        })
 
-            filters['source_category__active'] = True
 
-            mapped_attributes_count = CategoryMapping.objects.filter(
-                **filters, workspace_id=self.kwargs['workspace_id']
-            ).count()
-        else:
-            filters = {
-                'source_type': source_type,
-                'destination_type': destination_type,
-                'workspace_id': self.kwargs['workspace_id'],
-                'source__active': True
-            }
-            if app_name == 'QuickBooks Online' and source_type == 'CORPORATE_CARD':
-                filters.pop('destination_type')
-                filters['destination_type__in'] = ['CREDIT_CARD_ACCOUNT', 'BANK_ACCOUNT']
+class MappingStatsBatchView(ListAPIView):
+    """
+    Stats for total mapped and unmapped count of several source / destination type pairs
+    Pairs default to the Mapping Settings of the workspace, eg. ?pairs=EMPLOYEE:VENDOR,CATEGORY:ACCOUNT
+    """
+    def get(self, request, *args, **kwargs):
+        pairs = self.request.query_params.get('pairs', None)
+        app_name = self.request.query_params.get('app_name', None)
+        employee_vendor_purchase_from = self.request.query_params.get('employee_vendor_purchase_from', 'false')
 
-            mapped_attributes_count = Mapping.objects.filter(**filters).count()
-            activity_mapping = None
+        if pairs:
+            pairs = [tuple(pair.split(':')) for pair in pairs.split(',')]
+            assert_valid(
+                all(len(pair) == 2 and all(pair) for pair in pairs),
+                'query param pairs should be of the format SOURCE_TYPE:DESTINATION_TYPE,...'
+            )
 
-        if source_type == 'CATEGORY':
-            activity_attribute_count = ExpenseAttribute.objects.filter(
-                attribute_type='CATEGORY', value='Activity', workspace_id=self.kwargs['workspace_id'], active=True).count()
+        if not pairs:
+            pairs = MappingStatsHelper(workspace_id=self.kwargs['workspace_id']).get_mapping_settings_pairs()
 
-            if app_name in ('NetSuite', 'Sage Intacct', 'Sage 300 CRE', 'Dynamics 365 Business Central'):
-                activity_mapping = CategoryMapping.objects.filter(
-                    source_category__value='Activity', workspace_id=self.kwargs['workspace_id']).first()
-            else:
-                activity_mapping = Mapping.objects.filter(
-                    source_type='CATEGORY', source__value='Activity', workspace_id=self.kwargs['workspace_id']).first()
-
-            if activity_attribute_count and not activity_mapping:
-                mapped_attributes_count += activity_attribute_count
-
-        return Response(
-            data={
-                'all_attributes_count': total_attributes_count,
-                'unmapped_attributes_count': total_attributes_count - mapped_attributes_count
-            },
-            status=status.HTTP_200_OK
-        )
+        stats = MappingStatsCache.get_stats(
+            workspace_id=self.kwargs['workspace_id'],
+            pairs=pairs,
+            app_name=app_name,
+            employee_vendor_purchase_from=employee_vendor_purchase_from == 'true'
+        ) if pairs else []
+
+        return get_conditional_data_response(request, data=stats)
 
 
-class ExpenseAttributesMappingView(ListAPIView):
+class ExpenseAttributesMappingView(ConditionalListMixin, KeysetPaginationMixin, ListAPIView):
     serializer_class = ExpenseAttributeMappingSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ExpenseAttributeFilter
 
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-
+    def get_destination_type_list(self) -> List[str]:
         source_type = self.request.query_params.get('source_type')
         app_name = self.request.query_params.get('app_name')
         destination_type = self.request.query_params.get('destination_type', '')
 
         if app_name == 'QuickBooks Online' and source_type == 'CORPORATE_CARD':
-            destination_type_list = ['CREDIT_CARD_ACCOUNT', 'BANK_ACCOUNT']
-        else:
-            destination_type_list = [destination_type]
+            return ['CREDIT_CARD_ACCOUNT', 'BANK_ACCOUNT']
 
-        context['destination_type_list'] = destination_type_list
+        return [destination_type]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['destination_type_list'] = self.get_destination_type_list()
         return context
 
+    def get_etag_validators(self):
+        # Nested mappings and their destinations change without touching the expense attributes
+        return WorkspaceDataVersion.get_versions(
+            self.kwargs['workspace_id'],
+            [ExpenseAttribute, Mapping, DestinationAttribute],
+            [self.request.query_params.get('source_type'), *self.get_destination_type_list()]
+        )
+
+    def filter_queryset(self, queryset):
+        # Mappings of the page are fetched with their destination in one query and filtered in memory by the serializer
+        return super().filter_queryset(queryset).prefetch_related(
+            Prefetch(
+                'mapping',
+                queryset=Mapping.objects.filter(
+                    destination_type__in=self.get_destination_type_list()
+                ).select_related('destination')
+            )
+        )
+
     def get_queryset(self):
         mapped = self.request.query_params.get('mapped')
         source_type = self.request.query_params.get('source_type')
@@ -332,12 +365,14 @@ class ExpenseAttributesMappingView(ListAPIView):
         if app_name == 'QuickBooks Online' and source_type == 'CORPORATE_CARD':
             destination_type = ['CREDIT_CARD_ACCOUNT', 'BANK_ACCOUNT']
 
-        # Handle the 'mapped' parameter
+        # Handle the 'mapped' parameter with a correlated EXISTS, an attribute is matched once however many mappings it has
+        mapping_exists = Exists(Mapping.objects.filter(source_id=OuterRef('id'), destination_type__in=destination_type))
+
         param = None
         if mapped is True:
-            param = Q(mapping__destination_type__in=destination_type)
+            param = Q(mapping_exists)
         elif mapped is False:
-            param = ~Q(mapping__destination_type__in=destination_type)
+            param = ~Q(mapping_exists)
         else:
             return ExpenseAttribute.objects.filter(base_filters).order_by('value')
 
@@ -350,7 +385,7 @@ class ExpenseAttributesMappingView(ListAPIView):
         return ExpenseAttribute.objects.filter(final_filter).order_by('value')
 
 
-class CategoryAttributesMappingView(ListAPIView):
+class CategoryAttributesMappingView(KeysetPaginationMixin, ListAPIView):
     """
     Category Mapping View
     """
@@ -358,6 +393,16 @@ class CategoryAttributesMappingView(ListAPIView):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ExpenseAttributeFilter
 
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(queryset).prefetch_related(
+            Prefetch(
+                'categorymapping',
+                queryset=CategoryMapping.objects.select_related(
+                    'source_category', 'destination_account', 'destination_expense_head'
+                )
+            )
+        )
+
     def get_queryset(self):
         mapped = self.request.query_params.get('mapped')
         destination_type = self.request.query_params.get('destination_type', '')
@@ -378,12 +423,12 @@ class CategoryAttributesMappingView(ListAPIView):
         else:
             filters['destination_expense_head__attribute_type'] = destination_type
 
-        # Get source categories
-        source_categories = CategoryMapping.objects.filter(
+        # Category mappings of the outer attribute, source_category is already restricted to active categories below
+        category_mapping_exists = Exists(CategoryMapping.objects.filter(
             **filters,
-            source_category__active=True,
+            source_category_id=OuterRef('id'),
             workspace_id=self.kwargs['workspace_id'],
-        ).values_list('source_category_id', flat=True)
+        ))
 
         # Prepare filters for ExpenseAttribute
         base_filters = Q(workspace_id=self.kwargs['workspace_id']) & \
@@ -403,9 +448,9 @@ class CategoryAttributesMappingView(ListAPIView):
         # Handle the mapped parameter
         param = None
         if mapped is True:
-            param = Q(categorymapping__source_category_id__in=source_categories)
+            param = Q(category_mapping_exists)
         elif mapped is False:
-            param = ~Q(categorymapping__source_category_id__in=source_categories)
+            param = ~Q(category_mapping_exists)
         else:
             return ExpenseAttribute.objects.filter(base_filters).order_by('value')
 
@@ -418,12 +463,22 @@ class CategoryAttributesMappingView(ListAPIView):
         return ExpenseAttribute.objects.filter(final_filter).order_by('value')
 
 
-class EmployeeAttributesMappingView(ListAPIView):
+class EmployeeAttributesMappingView(KeysetPaginationMixin, ListAPIView):
 
     serializer_class = EmployeeAttributeMappingSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ExpenseAttributeFilter
 
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(queryset).prefetch_related(
+            Prefetch(
+                'employeemapping',
+                queryset=EmployeeMapping.objects.select_related(
+                    'source_employee', 'destination_employee', 'destination_vendor', 'destination_card_account'
+                )
+            )
+        )
+
     def get_queryset(self):
         mapped = self.request.query_params.get('mapped')
         destination_type = self.request.query_params.get('destination_type', '')
@@ -442,21 +497,24 @@ class EmployeeAttributesMappingView(ListAPIView):
         # For QuickBooks Desktop with both vendor and employee mapping enabled, include all mappings
         # Otherwise, filter by specific destination_type
         if app_name == 'QuickBooks Desktop Connector' and employee_vendor_purchase_from == 'true':
-            source_employees = EmployeeMapping.objects.filter(
+            employee_mappings = EmployeeMapping.objects.filter(
                 workspace_id=self.kwargs['workspace_id']
             ).filter(
                 Q(destination_vendor__isnull=False) | Q(destination_employee__isnull=False)
-            ).values_list('source_employee_id', flat=True)
+            )
         else:
             if destination_type == 'VENDOR':
                 filters['destination_vendor__attribute_type'] = destination_type
             else:
                 filters['destination_employee__attribute_type'] = destination_type
 
-            source_employees = EmployeeMapping.objects.filter(
+            employee_mappings = EmployeeMapping.objects.filter(
                 **filters,
                 workspace_id=self.kwargs['workspace_id'],
-            ).values_list('source_employee_id', flat=True)
+            )
+
+        # Employee mappings of the outer attribute, evaluated as a correlated EXISTS instead of an IN over all mappings
+        employee_mapping_exists = Exists(employee_mappings.filter(source_employee_id=OuterRef('id')))
         filters = {
             'workspace_id': self.kwargs['workspace_id'],
             'attribute_type': 'EMPLOYEE',
@@ -465,9 +523,9 @@ class EmployeeAttributesMappingView(ListAPIView):
 
         param = None
         if mapped:
-            param = Q(employeemapping__source_employee_id__in=source_employees)
+            param = Q(employee_mapping_exists)
         elif mapped is False:
-            param = ~Q(employeemapping__source_employee_id__in=source_employees)
+            param = ~Q(employee_mapping_exists)
         else:
             return ExpenseAttribute.objects.filter(Q(**filters)).order_by('value')
         final_filter = Q(**filters)
@@ -488,7 +546,7 @@ class ExpenseFieldView(ListAPIView):
         ).all()
 
 
-class DestinationAttributesView(LookupFieldMixin, ListAPIView):
+class DestinationAttributesView(RowSerializerMixin, LookupFieldMixin, ConditionalListMixin, StreamingListMixin, ListAPIView):
     """
     Destination Attributes view
     """
@@ -496,6 +554,7 @@ class DestinationAttributesView(LookupFieldMixin, ListAPIView):
     queryset = DestinationAttribute.objects.all().order_by('value')
     serializer_class = DestinationAttributeSerializer
     pagination_class = None
+    etag_models = [DestinationAttribute]
     filter_backends = (DjangoFilterBackend, JSONFieldFilterBackend,)
     filterset_fields = {'attribute_type': {'exact', 'in'}, 'display_name': {'exact', 'in'}, 'active': {'exact'}, 'destination_id': {'exact', 'in'}}
 
@@ -512,7 +571,8 @@ class FyleFieldsView(ListAPIView):
         return FyleFieldsSerializer().format_fyle_fields(self.kwargs["workspace_id"])
 
 
-class PaginatedDestinationAttributesView(LookupFieldMixin, ListAPIView):
+class PaginatedDestinationAttributesView(
+        RowSerializerMixin, LookupFieldMixin, ConditionalListMixin, KeysetPaginationMixin, ListAPIView):
     """
     Paginated Destination Attributes view
     """
@@ -520,6 +580,7 @@ class PaginatedDestinationAttributesView(LookupFieldMixin, ListAPIView):
     serializer_class = DestinationAttributeSerializer
     filter_backends = (DjangoFilterBackend, JSONFieldFilterBackend,)
     filterset_class = DestinationAttributeFilter
+    etag_models = [DestinationAttribute]
 
 
 class DestinationAttributesStatsView(LookupFieldMixin, ListAPIView):
@@ -531,25 +592,14 @@ class DestinationAttributesStatsView(LookupFieldMixin, ListAPIView):
         display_name = self.request.query_params.get('display_name', None)
         assert_valid(attribute_type is not None, 'query param attribute_type not found')
 
-        filters = {
-            'attribute_type': attribute_type,
-            'workspace_id': self.kwargs['workspace_id']
-        }
-
-        if display_name:
-            filters['display_name'] = display_name
-
-        query = DestinationAttribute.objects.filter(**filters)
-
-        total_attributes_count = query.count()
-        active_attributes_count = query.filter(active=True).count()
-        inactive_attributes_count = total_attributes_count - active_attributes_count
-
-        return Response(
-            data={
-                'attributes_count': total_attributes_count,
-                'active_attributes_count': active_attributes_count,
-                'inactive_attributes_count': inactive_attributes_count
-            },
-            status=status.HTTP_200_OK
+        stats = DestinationAttributesStatsCache.get_stats(
+            workspace_id=self.kwargs['workspace_id'],
+            attribute_type=attribute_type,
+            display_name=display_name
         )
+
+        return get_conditional_data_response(request, data={
+            'attributes_count': stats['attributes_count'],
+            'active_attributes_count': stats['active_attributes_count'],
+            'inactive_attributes_count': stats['attributes_count'] - stats['active_attributes_count']
+        })